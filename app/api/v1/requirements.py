@@ -2,14 +2,18 @@
 需求解析API端点
 提供文档解析和需求提取功能
 """
+import asyncio
+import shutil
 import tempfile
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO, Tuple
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 
 from app.requirements_parser.service import RequirementsParsingService
+from app.requirements_parser.extractors.langchain_extractor import AIProvider
 from app.requirements_parser.models.document import DocumentType
 
 
@@ -38,6 +42,27 @@ SUPPORTED_FORMATS = {
     }
 }
 
+# 扩展名到格式名称的映射（由SUPPORTED_FORMATS生成）
+EXTENSION_FORMATS = {
+    extension: format_name
+    for format_name, format_info in SUPPORTED_FORMATS.items()
+    for extension in format_info["extensions"]
+}
+
+# 上传文件分块写入的块大小（字节）
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# 响应中输出的文档字段（包含解析器附加的额外字段）
+DOCUMENT_RESPONSE_FIELDS = {
+    "title", "content", "document_type", "sections", "tables", "links", "user_stories"
+}
+
+# 响应中输出的需求字段
+REQUIREMENT_RESPONSE_FIELDS = {
+    "id", "title", "description", "type", "priority",
+    "acceptance_criteria", "source_document", "extracted_by"
+}
+
 
 def _get_file_type(filename: str) -> Optional[str]:
     """
@@ -49,14 +74,37 @@ def _get_file_type(filename: str) -> Optional[str]:
     Returns:
         str: 文件类型，如果不支持则返回None
     """
-    file_path = Path(filename)
-    extension = file_path.suffix.lower()
+    return EXTENSION_FORMATS.get(Path(filename).suffix.lower())
+
+
+@lru_cache(maxsize=None)
+def _get_parsing_service(ai_provider: str) -> RequirementsParsingService:
+    """
+    获取指定AI提供商的解析服务（按提供商缓存，避免每次请求重复初始化解析器和提取器）
     
-    for format_name, format_info in SUPPORTED_FORMATS.items():
-        if extension in format_info["extensions"]:
-            return format_name
+    Args:
+        ai_provider: AI提供商
+        
+    Returns:
+        RequirementsParsingService: 解析服务实例
+    """
+    return RequirementsParsingService(ai_provider=ai_provider)
+
+
+def _save_upload_to_temp(source: BinaryIO, suffix: str) -> Tuple[str, int]:
+    """
+    将上传文件分块写入临时文件，避免整个文件读入内存
     
-    return None
+    Args:
+        source: 上传文件对象
+        suffix: 文件后缀
+        
+    Returns:
+        Tuple[str, int]: 临时文件路径和文件大小（字节）
+    """
+    with tempfile.NamedTemporaryFile(mode='wb', suffix=suffix, delete=False) as temp_file:
+        shutil.copyfileobj(source, temp_file, UPLOAD_CHUNK_SIZE)
+        return temp_file.name, temp_file.tell()
 
 
 @router.post("/parse")
@@ -88,34 +136,40 @@ async def parse_requirements(
     # 检查文件类型
     file_type = _get_file_type(file.filename)
     if not file_type:
-        supported_exts = []
-        for format_info in SUPPORTED_FORMATS.values():
-            supported_exts.extend(format_info["extensions"])
         raise HTTPException(
             status_code=400,
-            detail=f"不支持的文件类型。支持的格式: {', '.join(supported_exts)}"
+            detail=f"不支持的文件类型。支持的格式: {', '.join(EXTENSION_FORMATS)}"
         )
     
-    # 读取文件内容
+    # 检查AI提供商
     try:
-        file_content = await file.read()
-        if not file_content:
-            raise HTTPException(status_code=400, detail="文件内容为空")
+        AIProvider(ai_provider)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的AI提供商: {ai_provider}。支持的提供商: {', '.join(p.value for p in AIProvider)}"
+        )
+    
+    # 创建解析服务（缺少API密钥等初始化错误同样按解析失败返回）
+    try:
+        parsing_service = _get_parsing_service(ai_provider)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"读取文件失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"解析文档失败: {str(e)}")
     
-    # 创建临时文件
-    temp_file_path = None
+    # 将上传内容分块写入临时文件（在线程中执行，避免阻塞事件循环）
     try:
-        # 根据文件类型创建临时文件
         suffix = Path(file.filename).suffix
-        with tempfile.NamedTemporaryFile(mode='wb', suffix=suffix, delete=False) as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
-        
-        # 创建解析服务
-        parsing_service = RequirementsParsingService(ai_provider=ai_provider)
-        
+        temp_file_path, file_size = await asyncio.to_thread(
+            _save_upload_to_temp, file.file, suffix
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"读取文件失败: {str(e)}")
+    
+    if not file_size:
+        os.unlink(temp_file_path)
+        raise HTTPException(status_code=400, detail="文件内容为空")
+    
+    try:
         # 解析文档和提取需求
         result = await parsing_service.parse_document(
             file_path=temp_file_path,
@@ -124,32 +178,15 @@ async def parse_requirements(
         
         # 构建响应
         response_data = {
-            "document": {
-                "title": result["document"].title,
-                "content": result["document"].content,
-                "document_type": result["document"].document_type,
-                "sections": result["document"].sections,
-                "tables": result["document"].tables,
-                "links": result["document"].links,
-                "user_stories": result["document"].user_stories
-            },
+            "document": result["document"].model_dump(include=DOCUMENT_RESPONSE_FIELDS),
             "requirements": [
-                {
-                    "id": req.id,
-                    "title": req.title,
-                    "description": req.description,
-                    "type": req.type,
-                    "priority": req.priority,
-                    "acceptance_criteria": req.acceptance_criteria,
-                    "source_document": req.source_document,
-                    "extracted_by": req.extracted_by
-                }
+                req.model_dump(include=REQUIREMENT_RESPONSE_FIELDS)
                 for req in result["requirements"]
             ],
             "metadata": {
                 "file_name": file.filename,
                 "file_type": file_type,
-                "file_size": len(file_content),
+                "file_size": file_size,
                 "ai_provider": ai_provider,
                 "extraction_accuracy": result.get("accuracy", 0.0),
                 "processing_time": result.get("processing_time", 0.0)
@@ -158,6 +195,9 @@ async def parse_requirements(
         
         return response_data
         
+    except ValueError as e:
+        # 解析服务抛出的错误信息已包含"解析文档失败"前缀，无需再次包装
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"解析文档失败: {str(e)}")
     
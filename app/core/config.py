@@ -5,7 +5,7 @@ TestMind AI - 配置管理
 from functools import lru_cache
 from typing import Optional
 
-from pydantic import Field, field_validator
+from pydantic import AliasChoices, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -42,6 +42,20 @@ class Settings(BaseSettings):
     # AI配置 - 通过环境变量配置
     openai_api_key: Optional[str] = Field(default=None, description="OpenAI API密钥")
     langchain_verbose: bool = Field(default=False, description="LangChain详细日志")
+    llm_cache_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("testmind_llm_cache", "llm_cache_enabled"),
+        description="是否启用LLM响应缓存（环境变量TESTMIND_LLM_CACHE=1开启）"
+    )
+    ai_request_timeout: float = Field(
+        default=0.0,
+        description="单次AI调用的总超时时间（秒），默认0表示不限制，只受各提供商客户端自身的超时约束"
+    )
+    llm_cache_path: str = Field(default=".testmind_llm_cache.db", description="LLM响应缓存数据库路径")
+    ollama_keep_alive: Optional[str] = Field(
+        default=None,
+        description="Ollama模型在内存中保留的时长（如30m、1h，-1m表示常驻，纯数字按秒），未设置时使用Ollama服务端配置"
+    )
 
     # 测试配置
     testing: bool = Field(default=False, description="测试模式")
@@ -3,9 +3,12 @@ LangChain需求提取器
 支持多种AI模型：OpenAI、Ollama、Gemini等
 """
 import json
+import re
 import asyncio
+import warnings
+import httpx
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 from enum import Enum
 
@@ -22,11 +25,16 @@ except ImportError:
     genai = None
 
 from app.core.config import get_settings
+from app.requirements_parser.extractors.llm_cache import LLMResponseCache
 from app.requirements_parser.models.document import Document
 from app.requirements_parser.models.requirement import (
     Requirement, RequirementType, Priority, RequirementCollection
 )
 
+# AI响应中JSON数组/对象的匹配模式（预编译，避免每次解析时重复编译）
+JSON_ARRAY_PATTERN = re.compile(r'\[.*?\]', re.DOTALL)
+JSON_OBJECT_PATTERN = re.compile(r'\{.*?\}', re.DOTALL)
+
 class AIProvider(str, Enum):
     """AI提供商枚举"""
     OPENAI = "openai"
@@ -37,11 +45,22 @@ class AIProvider(str, Enum):
 class LangChainExtractor:
     """多AI提供商需求提取器"""
 
+    # AI提供商到API调用方法的映射
+    _API_HANDLERS = {
+        AIProvider.OPENAI: "_call_openai_api",
+        AIProvider.OLLAMA: "_call_ollama_api",
+        AIProvider.GEMINI: "_call_gemini_api",
+        AIProvider.MOCK: "_call_mock_api",
+    }
+
     def __init__(self,
                  provider: AIProvider = AIProvider.OLLAMA,
                  api_key: Optional[str] = None,
                  model: Optional[str] = None,
-                 ollama_url: str = "http://localhost:11434"):
+                 ollama_url: str = "http://localhost:11434",
+                 cache_path: Optional[str] = None,
+                 request_timeout: Optional[float] = None,
+                 http_transport: Optional[httpx.AsyncBaseTransport] = None):
         """
         初始化需求提取器
 
@@ -50,11 +69,32 @@ class LangChainExtractor:
             api_key: API密钥（OpenAI/Gemini需要）
             model: 模型名称
             ollama_url: Ollama服务地址
+            cache_path: LLM响应缓存路径，未指定时按配置决定是否启用缓存，传入空字符串则禁用缓存
+            request_timeout: 单次AI调用超时时间（秒），未指定时使用配置值
+            http_transport: Ollama HTTP客户端使用的传输层，未指定时使用默认网络传输（测试时可注入httpx.MockTransport）
         """
         self.provider = provider
         self.ollama_url = ollama_url
         settings = get_settings()
 
+        # AI调用超时（避免模型卡住时无限等待）
+        if request_timeout is None:
+            request_timeout = settings.ai_request_timeout
+        self.request_timeout = request_timeout or None
+
+        # LLM响应缓存（相同提示词的重复调用直接返回缓存结果）
+        if cache_path is None and settings.llm_cache_enabled:
+            cache_path = settings.llm_cache_path
+        self.cache = LLMResponseCache(cache_path) if cache_path else None
+
+        # Ollama模型保留时长（多次提取间模型常驻内存，避免重复加载）
+        self.ollama_keep_alive = self._parse_keep_alive(settings.ollama_keep_alive)
+
+        # Ollama HTTP客户端（按事件循环懒加载，复用连接池）
+        self._http_transport = http_transport
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
         # 根据提供商初始化
         if provider == AIProvider.OPENAI:
             if openai is None:
@@ -136,6 +176,53 @@ class LangChainExtractor:
 
 请严格按照JSON格式返回提取的需求列表。"""
     
+    def _build_messages(self, document: Document, custom_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        构建AI请求消息
+
+        Args:
+            document: 要分析的文档
+            custom_prompt: 自定义提示词
+
+        Returns:
+            List[Dict]: 消息列表
+        """
+        user_prompt = custom_prompt or self.user_prompt_template.format(
+            title=document.title,
+            content=document.content
+        )
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    async def _get_ai_response(self, messages: List[Dict[str, str]]) -> str:
+        """
+        获取AI响应，启用缓存时优先读取缓存
+
+        Args:
+            messages: 消息列表
+
+        Returns:
+            str: AI响应内容
+        """
+        if self.cache is None:
+            return await self._call_ai_api(messages)
+
+        cache_key = LLMResponseCache.make_key(
+            self.provider, self.model, messages,
+            temperature=self.temperature, max_tokens=self.max_tokens
+        )
+        # 缓存读写涉及sqlite磁盘IO，放到线程中执行，避免阻塞事件循环
+        cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+        content = await self._call_ai_api(messages)
+        if content:
+            await asyncio.to_thread(self.cache.set, cache_key, content)
+        return content
+
     async def _call_ai_api(self, messages: List[Dict[str, str]]) -> str:
         """
         调用AI API（支持多提供商）
@@ -146,16 +233,10 @@ class LangChainExtractor:
         Returns:
             str: AI响应内容
         """
-        if self.provider == AIProvider.OPENAI:
-            return await self._call_openai_api(messages)
-        elif self.provider == AIProvider.OLLAMA:
-            return await self._call_ollama_api(messages)
-        elif self.provider == AIProvider.GEMINI:
-            return await self._call_gemini_api(messages)
-        elif self.provider == AIProvider.MOCK:
-            return await self._call_mock_api(messages)
-        else:
+        handler_name = self._API_HANDLERS.get(self.provider)
+        if handler_name is None:
             raise ValueError(f"不支持的AI提供商: {self.provider}")
+        return await getattr(self, handler_name)(messages)
 
     async def _call_openai_api(self, messages: List[Dict[str, str]]) -> str:
         """调用OpenAI API"""
@@ -181,16 +262,157 @@ class LangChainExtractor:
                 "num_predict": self.max_tokens
             }
         }
+        self._add_keep_alive(payload)
+
+        # 异步HTTP请求（复用连接池）
+        client = self._get_http_client()
+        response = await client.post(f"{self.ollama_url}/api/generate", json=payload)
+        if response.status_code != 200:
+            raise Exception(f"Ollama API错误: {response.status_code} - {self._get_error_detail(response)}")
+        return json.loads(response.content).get("response", "")
+
+    @staticmethod
+    def _parse_keep_alive(keep_alive: Optional[Union[str, int, float]]) -> Optional[Union[str, int, float]]:
+        """
+        规范化Ollama的keep_alive参数
+
+        Ollama把字符串按带单位的时长解析（如"30m"），"-1"这类纯数字字符串会被拒绝，
+        因此纯数字按秒数以数值形式发送
+
+        Args:
+            keep_alive: 配置的保留时长
+
+        Returns:
+            Optional[Union[str, int, float]]: 请求中使用的keep_alive，未设置时返回None
+        """
+        if not isinstance(keep_alive, str):
+            return keep_alive
+        keep_alive = keep_alive.strip()
+        if not keep_alive:
+            return None
+        for number_type in (int, float):
+            try:
+                return number_type(keep_alive)
+            except ValueError:
+                pass
+        return keep_alive
+
+    def _add_keep_alive(self, payload: Dict[str, Any],
+                        keep_alive: Optional[Union[str, int, float]] = None) -> Dict[str, Any]:
+        """
+        在Ollama请求中加入keep_alive（未配置时不发送，沿用服务端设置）
+
+        Args:
+            payload: Ollama请求体
+            keep_alive: 保留时长，未指定时使用配置值
+
+        Returns:
+            Dict[str, Any]: 请求体
+        """
+        keep_alive = self.ollama_keep_alive if keep_alive is None else self._parse_keep_alive(keep_alive)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    @staticmethod
+    def _get_error_detail(response: httpx.Response) -> str:
+        """
+        从错误响应中提取错误信息（只解码一次响应体）
+
+        Args:
+            response: HTTP响应
 
-        # 异步HTTP请求
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.ollama_url}/api/generate", json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get("response", "")
-                else:
-                    raise Exception(f"Ollama API错误: {response.status}")
+        Returns:
+            str: 错误信息
+        """
+        try:
+            body = json.loads(response.content)
+        except ValueError:
+            return response.text
+        if isinstance(body, dict):
+            return str(body.get("error") or body.get("detail") or response.text)
+        return response.text
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        获取当前事件循环对应的HTTP客户端
+
+        客户端与创建它的事件循环绑定，循环变化（如多次asyncio.run）时重新创建；
+        旧客户端应在其事件循环结束前通过aclose()关闭，否则只能尽力回收
+
+        Returns:
+            httpx.AsyncClient: HTTP客户端
+        """
+        loop = asyncio.get_running_loop()
+        if self._http_client is not None and self._http_client_loop is not loop:
+            self._discard_stale_http_client()
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                transport=self._http_transport,
+                timeout=httpx.Timeout(300.0, connect=5.0),
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                trust_env=False
+            )
+            self._http_client_loop = loop
+        return self._http_client
+
+    def _discard_stale_http_client(self) -> None:
+        """丢弃绑定在其他事件循环上的HTTP客户端，尽可能在原循环中关闭它"""
+        client, old_loop = self._http_client, self._http_client_loop
+        self._http_client = None
+        self._http_client_loop = None
+        if client.is_closed:
+            return
+        if old_loop is not None and old_loop.is_running():
+            # 原循环仍在其他线程运行，交给它关闭
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+        else:
+            # 原循环已结束，连接无法再正常关闭
+            warnings.warn(
+                "HTTP客户端未在其事件循环结束前关闭，请使用 async with 或 aclose()",
+                ResourceWarning,
+                stacklevel=3
+            )
+
+    async def __aenter__(self) -> "LangChainExtractor":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭HTTP客户端，释放连接"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._http_client_loop = None
+
+    async def warmup(self, keep_alive: Optional[Union[str, int, float]] = None) -> bool:
+        """
+        预加载Ollama模型（空提示词只加载模型，不做推理）
+
+        首次请求时Ollama才会把模型载入内存，提前预热可避免首次提取计入加载耗时
+
+        Args:
+            keep_alive: 模型在内存中保留的时长，未指定时使用配置值
+
+        Returns:
+            bool: 是否预热成功（非Ollama提供商直接返回False）
+        """
+        if self.provider != AIProvider.OLLAMA:
+            return False
+
+        payload = self._add_keep_alive({
+            "model": self.model,
+            "prompt": "",
+            "stream": False
+        }, keep_alive)
+        try:
+            client = self._get_http_client()
+            response = await client.post(f"{self.ollama_url}/api/generate", json=payload)
+        except httpx.HTTPError:
+            return False
+        return response.status_code == 200
 
     async def _call_gemini_api(self, messages: List[Dict[str, str]]) -> str:
         """调用Gemini API"""
@@ -237,25 +459,21 @@ class LangChainExtractor:
             Exception: 提取失败时抛出
         """
         try:
-            # 构建提示词
-            user_prompt = custom_prompt or self.user_prompt_template.format(
-                title=document.title,
-                content=document.content
-            )
-
             # 构建消息
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
+            messages = self._build_messages(document, custom_prompt)
 
-            # 调用AI API
-            content = await self._call_ai_api(messages)
+            # 调用AI API（优先使用缓存），超时后放弃等待
+            try:
+                async with asyncio.timeout(self.request_timeout):
+                    content = await self._get_ai_response(messages)
+            except TimeoutError:
+                raise Exception(f"AI调用超时（{self.request_timeout}秒）")
 
             # 清理和解析响应
             requirements_data = self._parse_ai_response(content)
 
-            # 转换为Requirement对象
+            # 转换为Requirement对象（同一批需求共用提取时间）
+            created_at = datetime.now()
             requirements = []
             for req_data in requirements_data:
                 requirement = Requirement(
@@ -267,7 +485,7 @@ class LangChainExtractor:
                     acceptance_criteria=req_data.get("acceptance_criteria", []),
                     source_document=document.title,
                     extracted_by=f"{self.provider}_extractor",
-                    created_at=datetime.now()
+                    created_at=created_at
                 )
                 requirements.append(requirement)
 
@@ -318,9 +536,7 @@ class LangChainExtractor:
             pass
 
         # 尝试提取JSON数组
-        import re
-        json_pattern = r'\[.*?\]'
-        json_matches = re.findall(json_pattern, cleaned_content, re.DOTALL)
+        json_matches = JSON_ARRAY_PATTERN.findall(cleaned_content)
 
         for match in json_matches:
             try:
@@ -329,8 +545,7 @@ class LangChainExtractor:
                 continue
 
         # 尝试提取单个JSON对象并包装成数组
-        json_pattern = r'\{.*?\}'
-        json_matches = re.findall(json_pattern, cleaned_content, re.DOTALL)
+        json_matches = JSON_OBJECT_PATTERN.findall(cleaned_content)
 
         if json_matches:
             objects = []
@@ -358,7 +573,14 @@ class LangChainExtractor:
         Returns:
             List[Requirement]: 提取的需求列表
         """
-        return asyncio.run(self.extract_async(document, custom_prompt))
+        return asyncio.run(self._extract_and_close(document, custom_prompt))
+
+    async def _extract_and_close(self, document: Document, custom_prompt: Optional[str]) -> List[Requirement]:
+        """在同一个事件循环中完成提取并关闭HTTP客户端（循环结束后客户端无法再关闭）"""
+        try:
+            return await self.extract_async(document, custom_prompt)
+        finally:
+            await self.aclose()
     
     async def extract_with_accuracy(self, document: Document, expected_count: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -392,32 +614,36 @@ class LangChainExtractor:
             "expected_count": expected_count
         }
     
-    async def extract_batch(self, documents: List[Document]) -> Dict[str, List[Requirement]]:
+    async def extract_batch(self, documents: List[Document], max_concurrency: int = 10) -> Dict[str, List[Requirement]]:
         """
         批量提取需求
         
         Args:
             documents: 文档列表
+            max_concurrency: 最大并发请求数
             
         Returns:
             Dict: 文档标题到需求列表的映射
         """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _extract_one(doc: Document) -> List[Requirement]:
+            async with semaphore:
+                return await self.extract_async(doc)
+
+        # 并发处理多个文档，结果按输入顺序返回
+        outcomes = await asyncio.gather(
+            *(_extract_one(doc) for doc in documents),
+            return_exceptions=True
+        )
+
         results = {}
-        
-        # 并发处理多个文档
-        tasks = []
-        for doc in documents:
-            task = self.extract_async(doc)
-            tasks.append((doc.title, task))
-        
-        # 等待所有任务完成
-        for title, task in tasks:
-            try:
-                requirements = await task
-                results[title] = requirements
-            except Exception as e:
-                results[title] = []
-                print(f"文档 {title} 提取失败: {e}")
+        for doc, outcome in zip(documents, outcomes):
+            if isinstance(outcome, Exception):
+                results[doc.title] = []
+                print(f"文档 {doc.title} 提取失败: {outcome}")
+            else:
+                results[doc.title] = outcome
         
         return results
     
@@ -0,0 +1,116 @@
+"""
+LLM响应缓存
+基于SQLite持久化AI响应，相同提示词的重复调用直接命中缓存
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存"""
+
+    def __init__(self, database_path: str = ".testmind_llm_cache.db", memory_size: int = 256):
+        """
+        初始化缓存
+
+        Args:
+            database_path: SQLite数据库文件路径
+            memory_size: 内存LRU缓存条目数（位于SQLite之前，0表示不使用）
+        """
+        self.database_path = str(database_path)
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        Path(self.database_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "cache_key TEXT PRIMARY KEY, "
+                "response TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        """
+        生成缓存键
+
+        Args:
+            provider: AI提供商
+            model: 模型名称
+            messages: 消息列表
+            **params: 其他影响输出的参数（温度、最大token数等）
+
+        Returns:
+            str: 缓存键（BLAKE2b摘要）
+        """
+        payload = json.dumps(
+            {"provider": str(provider), "model": model, "messages": messages, "params": params},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[str]: 缓存的响应内容，未命中时返回None
+        """
+        with self._lock:
+            # 优先查内存缓存
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """
+        写入响应到缓存
+
+        Args:
+            key: 缓存键
+            response: AI响应内容
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, response) VALUES (?, ?)",
+                (key, response)
+            )
+            self._remember(key, response)
+
+    def _remember(self, key: str, response: str) -> None:
+        """写入内存LRU缓存，超出容量时淘汰最久未使用的条目"""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._memory.clear()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -2,11 +2,16 @@
 需求数据模型
 定义需求的结构、类型和属性
 """
+from collections import Counter
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field, field_validator, ConfigDict, field_serializer
 
+def _enum_value(value: Any) -> Any:
+    """获取枚举的原始值（use_enum_values下字段可能已是字符串）"""
+    return getattr(value, "value", value)
+
 class RequirementType(str, Enum):
     """需求类型枚举"""
     FUNCTIONAL = "functional"
@@ -240,23 +245,29 @@ class RequirementCollection(BaseModel):
         """更新统计信息"""
         self.total_count = len(self.requirements)
         
+        # 单次遍历统计类型、优先级和状态（兼容枚举和已转换为字符串的值）
+        type_counts = Counter()
+        priority_counts = Counter()
+        status_counts = Counter()
+        for req in self.requirements:
+            type_counts[_enum_value(req.type)] += 1
+            priority_counts[_enum_value(req.priority)] += 1
+            status_counts[_enum_value(req.status)] += 1
+        
         # 类型统计
-        self.functional_count = len(self.get_requirements_by_type(RequirementType.FUNCTIONAL))
-        self.non_functional_count = len(self.get_requirements_by_type(RequirementType.NON_FUNCTIONAL))
-        self.user_story_count = len(self.get_requirements_by_type(RequirementType.USER_STORY))
+        self.functional_count = type_counts[RequirementType.FUNCTIONAL.value]
+        self.non_functional_count = type_counts[RequirementType.NON_FUNCTIONAL.value]
+        self.user_story_count = type_counts[RequirementType.USER_STORY.value]
         
-        # 优先级分布
-        self.priority_distribution = {}
-        for priority in Priority:
-            count = len(self.get_requirements_by_priority(priority))
-            if count > 0:
-                self.priority_distribution[priority.value] = count
+        # 优先级分布（按优先级枚举顺序）
+        self.priority_distribution = {
+            priority.value: priority_counts[priority.value]
+            for priority in Priority
+            if priority_counts[priority.value] > 0
+        }
         
         # 状态分布
-        self.status_distribution = {}
-        for req in self.requirements:
-            status = req.status.value
-            self.status_distribution[status] = self.status_distribution.get(status, 0) + 1
+        self.status_distribution = dict(status_counts)
         
         # 平均置信度
         confidence_scores = [req.confidence_score for req in self.requirements if req.confidence_score is not None]
@@ -28,9 +28,19 @@ class MarkdownParser(BaseParser):
         # 检查依赖
         if markdown is None:
             raise ImportError("需要安装markdown库: pip install markdown")
-        
-        # 配置Markdown解析器
-        self.md = markdown.Markdown(
+    
+    @staticmethod
+    def _create_markdown() -> "markdown.Markdown":
+        """
+        创建Markdown转换器
+
+        markdown.Markdown实例带有转换状态且不是线程安全的，
+        解析器会在多个请求间共享，因此每次解析都创建新的实例。
+
+        Returns:
+            markdown.Markdown: 配置好扩展的转换器
+        """
+        return markdown.Markdown(
             extensions=[
                 'markdown.extensions.meta',
                 'markdown.extensions.tables',
@@ -76,7 +86,7 @@ class MarkdownParser(BaseParser):
                 pass
         
         # 解析Markdown
-        html_content = self.md.convert(clean_content)
+        html_content = self._create_markdown().convert(clean_content)
         
         # 提取标题
         title = self._extract_title_from_frontmatter_or_content(frontmatter_data, clean_content)
@@ -2,6 +2,7 @@
 需求解析服务
 整合文档解析器和需求提取器，提供统一的解析服务
 """
+import asyncio
 import time
 from pathlib import Path
 from typing import Dict, List, Any
@@ -14,6 +15,18 @@ from app.requirements_parser.parsers.word_parser import WordParser
 from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
 
 
+# 扩展名到文档类型的映射
+EXTENSION_DOCUMENT_TYPES = {
+    ".md": DocumentType.MARKDOWN,
+    ".markdown": DocumentType.MARKDOWN,
+    ".mdown": DocumentType.MARKDOWN,
+    ".mkd": DocumentType.MARKDOWN,
+    ".pdf": DocumentType.PDF,
+    ".docx": DocumentType.WORD,
+    ".doc": DocumentType.WORD,
+}
+
+
 class RequirementsParsingService:
     """需求解析服务"""
     
@@ -57,7 +70,7 @@ class RequirementsParsingService:
         Raises:
             ValueError: 文件类型不支持或解析失败时抛出
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # 确定文档类型
@@ -73,7 +86,7 @@ class RequirementsParsingService:
             )
             
             # 计算处理时间
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             
             # 计算准确率（简单估算）
             accuracy = self._estimate_accuracy(document, requirements)
@@ -101,17 +114,11 @@ class RequirementsParsingService:
         Raises:
             ValueError: 不支持的文件类型时抛出
         """
-        path = Path(file_path)
-        extension = path.suffix.lower()
-        
-        if extension in {'.md', '.markdown', '.mdown', '.mkd'}:
-            return DocumentType.MARKDOWN
-        elif extension == '.pdf':
-            return DocumentType.PDF
-        elif extension in {'.docx', '.doc'}:
-            return DocumentType.WORD
-        else:
+        extension = Path(file_path).suffix.lower()
+        document_type = EXTENSION_DOCUMENT_TYPES.get(extension)
+        if document_type is None:
             raise ValueError(f"不支持的文件类型: {extension}")
+        return document_type
     
     async def _parse_document(self, file_path: str, document_type: DocumentType) -> Document:
         """
@@ -128,12 +135,13 @@ class RequirementsParsingService:
         if not parser:
             raise ValueError(f"没有找到适合的解析器: {document_type}")
         
-        # 对于Markdown，直接从文件解析
+        # 解析器为同步阻塞I/O，放到线程中执行，避免阻塞事件循环
         if document_type == DocumentType.MARKDOWN:
-            return parser.parse_from_file(file_path)
+            # 对于Markdown，直接从文件解析
+            return await asyncio.to_thread(parser.parse_from_file, file_path)
         else:
             # 对于PDF和Word，使用文件路径
-            return parser.parse(file_path)
+            return await asyncio.to_thread(parser.parse, file_path)
     
     async def _extract_requirements(
         self, 
@@ -172,7 +180,7 @@ class RequirementsParsingService:
             
             return requirements
             
-        except Exception as e:
+        except Exception:
             # 如果AI提取失败，返回基于文档结构的简单需求
             return self._extract_simple_requirements(document)
     
@@ -262,8 +270,7 @@ class RequirementsParsingService:
         Returns:
             Dict: 支持的格式信息
         """
-        return {
-            "markdown": [".md", ".markdown", ".mdown", ".mkd"],
-            "pdf": [".pdf"],
-            "word": [".docx", ".doc"]
-        }
+        formats: Dict[str, List[str]] = {}
+        for extension, document_type in EXTENSION_DOCUMENT_TYPES.items():
+            formats.setdefault(document_type.value, []).append(extension)
+        return formats
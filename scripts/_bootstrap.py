@@ -0,0 +1,12 @@
+"""
+脚本公共启动配置
+将项目根目录加入Python路径（只加入一次），使脚本可以直接导入app包
+直接运行脚本时以 _bootstrap 导入，以 python -m scripts.xxx 运行时以 scripts._bootstrap 导入
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
@@ -0,0 +1,22 @@
+"""
+qwen3:4b 测试脚本公共配置
+test_ollama_qwen.py 与 simple_qwen_test.py 共用同一个提取器工厂
+"""
+from functools import lru_cache
+
+try:
+    import _bootstrap  # noqa: F401
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts import _bootstrap  # noqa: F401
+
+from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
+
+
+@lru_cache(maxsize=None)
+def get_extractor() -> LangChainExtractor:
+    """获取共享的qwen3:4b提取器（各测试复用同一实例和连接池）"""
+    return LangChainExtractor(
+        provider=AIProvider.OLLAMA,
+        model="qwen3:4b",
+        ollama_url="http://localhost:11434"
+    )
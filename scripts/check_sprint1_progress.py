@@ -3,11 +3,72 @@
 Sprint 1 进度检查脚本
 基于TDD验证Sprint 1的完成情况
 """
-import subprocess
+import importlib.util
+import io
+import os
+import shutil
 import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import lru_cache
 from pathlib import Path
 import json
 
+import pytest
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=1)
+def _load_app():
+    """
+    创建FastAPI应用（结果缓存，异常同样缓存，避免重复进入导入流程）
+
+    Returns:
+        tuple: (应用实例, 异常)，二者只有一个不为None
+    """
+    try:
+        from app.main import create_app
+        return create_app(), None
+    except Exception as e:
+        return None, e
+
+
+@lru_cache(maxsize=1)
+def _load_settings():
+    """
+    加载应用配置（结果缓存，异常同样缓存）
+
+    Returns:
+        tuple: (配置实例, 异常)，二者只有一个不为None
+    """
+    try:
+        from app.core.config import get_settings
+        return get_settings(), None
+    except Exception as e:
+        return None, e
+
+
+def _cached_app():
+    """获取缓存的FastAPI应用，创建失败时抛出缓存的异常"""
+    app, error = _load_app()
+    if error is not None:
+        raise error
+    return app
+
+
+def _cached_settings():
+    """获取缓存的应用配置，加载失败时抛出缓存的异常"""
+    settings, error = _load_settings()
+    if error is not None:
+        raise error
+    return settings
+
+
 class Sprint1ProgressChecker:
     def __init__(self):
         self.project_root = Path.cwd()
@@ -15,18 +76,55 @@ class Sprint1ProgressChecker:
         
     def check_task(self, task_id, description, check_function):
         """检查单个任务"""
-        print(f"🔍 检查 {task_id}: {description}")
+        return self._record_result(*self._run_check((task_id, description, check_function)))
+    
+    @staticmethod
+    def _run_check(task):
+        """
+        执行单个检查（不输出、不修改共享状态，可在线程池中运行）
+
+        Args:
+            task: (任务ID, 描述, 检查函数) 元组
+
+        Returns:
+            tuple: (任务ID, 描述, 是否完成, 错误信息)
+        """
+        task_id, description, check_function = task
         try:
-            result = check_function()
-            status = "✅ 完成" if result else "❌ 未完成"
-            print(f"   {status}")
-            self.results[task_id] = {"description": description, "completed": result}
-            return result
+            return task_id, description, bool(check_function()), None
         except Exception as e:
-            print(f"   ❌ 检查失败: {e}")
-            self.results[task_id] = {"description": description, "completed": False, "error": str(e)}
+            return task_id, description, False, str(e)
+    
+    def _record_result(self, task_id, description, completed, error):
+        """输出并记录单个检查结果"""
+        print(f"🔍 检查 {task_id}: {description}")
+        if error is not None:
+            print(f"   ❌ 检查失败: {error}")
+            self.results[task_id] = {"description": description, "completed": False, "error": error}
             return False
+        status = "✅ 完成" if completed else "❌ 未完成"
+        print(f"   {status}")
+        self.results[task_id] = {"description": description, "completed": completed}
+        return completed
     
+    def _run_pytest(self, args):
+        """
+        在当前进程内运行pytest（避免启动子进程），并屏蔽其输出
+
+        重定向会替换进程级的sys.stdout，只能在没有其他检查并发运行时调用；
+        清空配置文件中的addopts（覆盖率等选项不适合在同一进程中重复执行），并禁用缓存插件
+
+        Args:
+            args: pytest命令行参数
+
+        Returns:
+            bool: pytest是否成功退出
+        """
+        buffer = io.StringIO()
+        with redirect_stdout(buffer), redirect_stderr(buffer):
+            exit_code = pytest.main(["-o", "addopts=", "-p", "no:cacheprovider", *args])
+        return exit_code == 0
+
     def check_env_001(self):
         """ENV-001: 开发环境配置"""
         checks = []
@@ -50,11 +148,8 @@ class Sprint1ProgressChecker:
             checks.append(False)
         
         # Docker检查（可选）
-        try:
-            result = subprocess.run(["docker", "--version"], capture_output=True, text=True)
-            checks.append(result.returncode == 0)
-        except FileNotFoundError:
-            checks.append(False)  # Docker不是必需的，但建议有
+        # 只在PATH中查找docker可执行文件，无需启动子进程
+        checks.append(shutil.which("docker") is not None)  # Docker不是必需的，但建议有
         
         return sum(checks) >= 3  # 至少3/4通过
     
@@ -72,14 +167,24 @@ class Sprint1ProgressChecker:
             "pytest.ini"
         ]
         
+        # 按父目录分组，每个目录只扫描一次
+        required_by_parent = defaultdict(set)
         for path in required_structure:
-            if not (self.project_root / path).exists():
+            parent, _, name = path.rpartition("/")
+            required_by_parent[parent].add(name)
+        
+        for parent, required_names in required_by_parent.items():
+            try:
+                with os.scandir(self.project_root / parent) as entries:
+                    present = {entry.name for entry in entries}
+            except FileNotFoundError:
+                return False
+            if not required_names <= present:
                 return False
         
         # 检查FastAPI应用是否可以创建
         try:
-            from app.main import create_app
-            app = create_app()
+            _cached_app()
             return True
         except Exception:
             return False
@@ -89,8 +194,7 @@ class Sprint1ProgressChecker:
         # 目前只检查数据库连接模块是否存在
         # 实际的数据库设计将在后续任务中完成
         try:
-            from app.core.config import get_settings
-            settings = get_settings()
+            settings = _cached_settings()
             return hasattr(settings, 'database_url')
         except Exception:
             return False
@@ -99,13 +203,7 @@ class Sprint1ProgressChecker:
         """ENV-004: CI/CD流水线（基础版本）"""
         # 检查测试是否可以运行
         try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pytest", "--collect-only", "-q"],
-                capture_output=True,
-                text=True,
-                cwd=self.project_root
-            )
-            return result.returncode == 0
+            return self._run_pytest(["--collect-only", "-q"])
         except Exception:
             return False
     
@@ -115,40 +213,30 @@ class Sprint1ProgressChecker:
         
         # 1. 开发环境可正常启动
         try:
-            from app.main import create_app
-            app = create_app()
+            _cached_app()
             criteria.append(True)
         except Exception:
             criteria.append(False)
         
         # 2. 数据库连接正常（配置层面）
         try:
-            from app.core.config import get_settings
-            settings = get_settings()
+            settings = _cached_settings()
             criteria.append(bool(settings.database_url))
         except Exception:
             criteria.append(False)
         
         # 3. CI/CD流水线运行成功（测试层面）
         try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pytest", "tests/unit/test_environment.py", "-v"],
-                capture_output=True,
-                text=True
-            )
-            criteria.append(result.returncode == 0)
+            criteria.append(self._run_pytest(["tests/unit/test_environment.py", "-v"]))
         except Exception:
             criteria.append(False)
         
         # 4. 团队成员都能正常开发（工具链检查）
-        tools_available = []
-        for tool in ["black", "flake8", "pytest"]:
-            try:
-                result = subprocess.run([sys.executable, "-m", tool, "--version"], 
-                                      capture_output=True)
-                tools_available.append(result.returncode == 0)
-            except Exception:
-                tools_available.append(False)
+        # 只检查模块是否可导入，无需为每个工具启动子进程
+        tools_available = [
+            importlib.util.find_spec(tool) is not None
+            for tool in ("black", "flake8", "pytest")
+        ]
         
         criteria.append(all(tools_available))
         
@@ -158,17 +246,26 @@ class Sprint1ProgressChecker:
         """运行完整的Sprint 1检查"""
         print("🎯 Sprint 1 进度检查开始...\n")
         
-        # 检查各个任务
-        tasks = [
+        # 检查各个任务（导入/文件系统检查可并发执行）
+        concurrent_tasks = [
             ("ENV-001", "开发环境配置", self.check_env_001),
             ("ENV-002", "项目结构初始化", self.check_env_002), 
-            ("ENV-003", "数据库设计（基础）", self.check_env_003),
+            ("ENV-003", "数据库设计（基础）", self.check_env_003)
+        ]
+        # 运行pytest的检查在当前进程内执行，会重定向标准输出，须在并发检查结束后串行执行
+        serial_tasks = [
             ("ENV-004", "CI/CD流水线（基础）", self.check_env_004)
         ]
+        tasks = concurrent_tasks + serial_tasks
+        
+        # 并发检查执行完后再运行串行检查，最后按原顺序输出结果
+        with ThreadPoolExecutor(max_workers=len(concurrent_tasks)) as executor:
+            outcomes = list(executor.map(self._run_check, concurrent_tasks))
+        outcomes += [self._run_check(task) for task in serial_tasks]
         
         completed_tasks = 0
-        for task_id, description, check_func in tasks:
-            if self.check_task(task_id, description, check_func):
+        for outcome in outcomes:
+            if self._record_result(*outcome):
                 completed_tasks += 1
         
         print(f"\n📊 任务完成情况: {completed_tasks}/{len(tasks)}")
@@ -190,29 +287,42 @@ class Sprint1ProgressChecker:
         """生成进度报告"""
         progress_percentage = (completed / total) * 100
         
-        print(f"\n📋 Sprint 1 进度报告")
-        print(f"=" * 50)
-        print(f"总体进度: {progress_percentage:.1f}% ({completed}/{total})")
-        print(f"验收状态: {'✅ 通过' if acceptance_passed else '❌ 未通过'}")
+        # 汇总报告内容，最后一次性输出
+        lines = [
+            "",
+            "📋 Sprint 1 进度报告",
+            "=" * 50,
+            f"总体进度: {progress_percentage:.1f}% ({completed}/{total})",
+            f"验收状态: {'✅ 通过' if acceptance_passed else '❌ 未通过'}",
+        ]
         
         if progress_percentage == 100 and acceptance_passed:
-            print(f"\n🎉 Sprint 1 完成！可以开始Sprint 2")
-            print(f"📋 下一步:")
-            print(f"   1. 开始需求解析模块开发")
-            print(f"   2. 集成LangChain")
-            print(f"   3. 实现文档解析器")
+            lines += [
+                "",
+                "🎉 Sprint 1 完成！可以开始Sprint 2",
+                "📋 下一步:",
+                "   1. 开始需求解析模块开发",
+                "   2. 集成LangChain",
+                "   3. 实现文档解析器",
+            ]
         else:
-            print(f"\n⚠️  Sprint 1 尚未完成")
-            print(f"📋 待完成任务:")
-            for task_id, result in self.results.items():
-                if not result["completed"]:
-                    print(f"   - {task_id}: {result['description']}")
+            lines += ["", "⚠️  Sprint 1 尚未完成", "📋 待完成任务:"]
+            lines += [
+                f"   - {task_id}: {result['description']}"
+                for task_id, result in self.results.items()
+                if not result["completed"]
+            ]
         
         # 保存结果到文件
-        with open("sprint1_progress.json", "w") as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            data = orjson.dumps(self.results, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(self.results, indent=2, ensure_ascii=False).encode("utf-8")
+        Path("sprint1_progress.json").write_bytes(data)
         
-        print(f"\n💾 详细结果已保存到: sprint1_progress.json")
+        lines += ["", "💾 详细结果已保存到: sprint1_progress.json"]
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     checker = Sprint1ProgressChecker()
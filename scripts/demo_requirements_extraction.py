@@ -4,134 +4,215 @@ TestMind AI - 需求提取演示
 展示完整的文档解析 → AI需求提取流程
 使用您的Ollama + qwen3:4b配置
 """
+import argparse
 import asyncio
 import sys
 import json
+import textwrap
+from collections import Counter
 from pathlib import Path
+from typing import List, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    import _bootstrap  # noqa: F401
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts import _bootstrap  # noqa: F401
 
 from app.requirements_parser.parsers.markdown_parser import MarkdownParser
 from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
 from app.requirements_parser.models.document import Document, DocumentType
+from app.requirements_parser.models.requirement import Requirement
+from app.core.config import get_settings
 
-async def demo_complete_workflow():
-    """演示完整的需求提取工作流程"""
-    print("🚀 TestMind AI - 需求提取演示")
-    print("=" * 60)
-    print("使用技术栈：")
-    print("📄 文档解析：Markdown Parser")
-    print("🤖 AI模型：Ollama + qwen3:4b (免费本地)")
-    print("🔧 框架：LangChain + FastAPI")
-    print("=" * 60)
-    
-    # 1. 创建示例需求文档
-    print("\n📝 步骤1：创建示例需求文档")
-    
-    sample_markdown = """# 在线教育平台需求规格说明书
+# 示例需求文档（在线教育平台需求规格说明书）
+SAMPLE_DOCUMENT = Path(__file__).parent / "samples" / "education_platform.md"
 
-## 项目概述
-开发一个面向K12教育的在线学习平台，支持直播课程、作业管理和学习进度跟踪。
+# 演示结束时的总结信息（模块级预先构建，一次输出）
+SUMMARY_TEXT = textwrap.dedent("""
+    🎉 演示完成！
+    ============================================================
+    ✅ 成功展示了完整的需求提取流程：
+       1. 📄 Markdown文档解析
+       2. 🤖 AI智能需求提取
+       3. 📊 结构化数据输出
+       4. 🎯 质量评估和验证
+       5. 💾 结果导出和存储
 
-## 用户故事
+    🆓 使用的是完全免费的本地AI方案！
+    🚀 您可以开始处理真实的需求文档了！""")
 
-### 作为学生，我希望能够观看直播课程
-**验收标准：**
-- 支持高清视频直播（1080p）
-- 延迟小于3秒
-- 支持课程回放功能
-- 可以在课程中提问和互动
-- 支持多设备同步观看
+# 演示失败时的故障排除建议
+TROUBLESHOOTING_TEXT = textwrap.dedent("""
+    🔧 故障排除建议:
+       1. 确保Ollama服务正在运行: ollama serve
+       2. 确保qwen3:4b模型已下载: ollama list
+       3. 检查网络连接和端口11434""")
 
-**优先级：** 高
+# 文档拆分的最大份数（各部分并发提取，缩短单次调用的上下文长度）
+MAX_DOCUMENT_PARTS = 4
 
-### 作为老师，我希望能够创建和管理课程
-**验收标准：**
-- 可以创建课程大纲和课程表
-- 支持上传课件和教学资源
-- 可以布置和批改作业
-- 能够查看学生学习进度
-- 支持课堂互动工具
+# 同时发往模型的提取请求数（本地单个Ollama服务会排队处理并发请求）
+MAX_CONCURRENT_EXTRACTIONS = 2
 
-**优先级：** 高
 
-### 作为家长，我希望能够监控孩子的学习情况
-**验收标准：**
-- 可以查看孩子的课程安排
-- 能够看到作业完成情况
-- 可以查看学习时长统计
-- 接收学习进度报告
-- 可以与老师沟通
+def _balance_blocks(sizes: List[int], part_count: int) -> List[Tuple[int, int]]:
+    """
+    将连续的块划分为若干部分，使最大部分尽可能小，并将过小的部分并入相邻部分
 
-**优先级：** 中
+    Args:
+        sizes: 各块的长度
+        part_count: 最多划分的份数
 
-## 功能需求
+    Returns:
+        List[Tuple[int, int]]: 各部分对应的块下标区间 [start, end)
+    """
+    prefix = [0]
+    for size in sizes:
+        prefix.append(prefix[-1] + size)
+    
+    # best[k][i]: 前i个块分成k份时最大部分的最小长度，cut记录最后一份的起点
+    n = len(sizes)
+    best = [[float("inf")] * (n + 1) for _ in range(part_count + 1)]
+    cut = [[0] * (n + 1) for _ in range(part_count + 1)]
+    best[0][0] = 0
+    for k in range(1, part_count + 1):
+        for i in range(k, n + 1):
+            for j in range(k - 1, i):
+                candidate = max(best[k - 1][j], prefix[i] - prefix[j])
+                if candidate < best[k][i]:
+                    best[k][i] = candidate
+                    cut[k][i] = j
+    
+    ranges = []
+    end = n
+    for k in range(part_count, 0, -1):
+        ranges.insert(0, (cut[k][end], end))
+        end = cut[k][end]
+    
+    # 不足平均长度一半的部分并入较短的相邻部分
+    min_size = prefix[n] / part_count / 2
+    while len(ranges) > 1:
+        lengths = [prefix[end] - prefix[start] for start, end in ranges]
+        smallest = min(range(len(ranges)), key=lengths.__getitem__)
+        if lengths[smallest] >= min_size:
+            break
+        if smallest == 0:
+            neighbor = 1
+        elif smallest == len(ranges) - 1:
+            neighbor = smallest - 1
+        else:
+            neighbor = min(smallest - 1, smallest + 1, key=lengths.__getitem__)
+        first, second = sorted((smallest, neighbor))
+        ranges[first:second + 1] = [(ranges[first][0], ranges[second][1])]
+    return ranges
+
+
+def split_document(document: Document, max_parts: int = MAX_DOCUMENT_PARTS) -> List[Document]:
+    """
+    按二级章节将文档拆分为若干子文档
 
-### 1. 用户管理系统
-- 支持学生、老师、家长三种角色注册
-- 实名认证功能
-- 权限管理和角色切换
-- 个人信息管理
+    Args:
+        document: 解析后的文档（需包含sections）
+        max_parts: 最多拆分的份数
 
-### 2. 课程管理系统
-- 课程创建和编辑
-- 课程分类和搜索
-- 课程评价和推荐
-- 课程资源管理
+    Returns:
+        List[Document]: 子文档列表，无法拆分时返回原文档
+    """
+    # 以二级标题为边界，将其下级章节归入同一块
+    blocks = []
+    for section in getattr(document, 'sections', []):
+        text = f"{'#' * section['level']} {section['title']}\n{section['content']}"
+        if section['level'] <= 2 or not blocks:
+            blocks.append([text])
+        else:
+            blocks[-1].append(text)
+    
+    if len(blocks) < 2:
+        return [document]
+    
+    # 按内容长度将连续的章节块均衡分配到各部分
+    block_texts = ["\n\n".join(block) for block in blocks]
+    groups = [
+        block_texts[start:end]
+        for start, end in _balance_blocks([len(text) for text in block_texts], min(max_parts, len(blocks)))
+    ]
+    
+    parts = [
+        Document(
+            title=f"{document.title} ({index}/{len(groups)})",
+            content="\n\n".join(group),
+            document_type=document.document_type
+        )
+        for index, group in enumerate(groups, 1)
+    ]
+    return parts
 
-### 3. 直播教学系统
-- 实时音视频传输
-- 屏幕共享功能
-- 白板工具
-- 课堂互动（举手、投票）
-- 课程录制和回放
 
-### 4. 作业管理系统
-- 作业发布和收集
-- 在线批改工具
-- 成绩统计和分析
-- 作业提醒功能
+async def extract_parts(extractor: LangChainExtractor, parts: List[Document],
+                        max_concurrency: int = MAX_CONCURRENT_EXTRACTIONS) -> List[Requirement]:
+    """
+    并发提取各部分文档的需求并合并，单个部分失败不影响其他部分
 
-### 5. 学习进度跟踪
-- 学习时长统计
-- 知识点掌握度分析
-- 学习报告生成
-- 个性化学习建议
+    Args:
+        extractor: 需求提取器
+        parts: 拆分后的子文档列表
+        max_concurrency: 最大并发请求数
 
-## 非功能需求
+    Returns:
+        List[Requirement]: 提取成功的各部分需求（按部分顺序合并）
 
-### 性能要求
-- 系统响应时间 < 2秒
-- 支持10000并发用户
-- 视频加载时间 < 5秒
-- 99.9%系统可用性
+    Raises:
+        Exception: 所有部分都提取失败时抛出第一个错误
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-### 安全要求
-- 用户数据加密存储
-- 支持HTTPS传输
-- 防止视频盗录
-- 定期安全审计
+    async def _extract_one(part: Document) -> List[Requirement]:
+        async with semaphore:
+            return await extractor.extract_async(part)
 
-### 兼容性要求
-- 支持主流浏览器（Chrome、Firefox、Safari、Edge）
-- 支持移动端（iOS、Android）
-- 支持平板设备
-- 向下兼容旧版本浏览器
+    outcomes = await asyncio.gather(*(_extract_one(part) for part in parts), return_exceptions=True)
 
-### 可扩展性要求
-- 支持水平扩展
-- 模块化架构设计
-- 支持第三方集成
-- 国际化支持
+    requirements = []
+    errors = []
+    for part, outcome in zip(parts, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append(outcome)
+            print(f"⚠️  {part.title} 提取失败: {outcome}")
+        else:
+            requirements.extend(outcome)
 
-## 系统约束
-- 必须符合教育部相关法规
-- 保护未成年人隐私
-- 内容审核机制
-- 数据本地化存储
-"""
+    if errors and len(errors) == len(parts):
+        raise errors[0]
+    if errors:
+        print(f"⚠️  {len(errors)}/{len(parts)} 个部分提取失败，已合并其余部分的结果")
+    return requirements
+
+
+async def demo_complete_workflow(use_cache: bool = True):
+    """
+    演示完整的需求提取工作流程
+
+    Args:
+        use_cache: 是否缓存AI响应（输入不变时重复运行直接命中缓存）
+    """
+    print("🚀 TestMind AI - 需求提取演示")
+    print("=" * 60)
+    print("使用技术栈：")
+    print("📄 文档解析：Markdown Parser")
+    print("🤖 AI模型：Ollama + qwen3:4b (免费本地)")
+    print("🔧 框架：LangChain + FastAPI")
+    print("=" * 60)
+    
+    # 1. 创建示例需求文档
+    print("\n📝 步骤1：创建示例需求文档")
+    
+    sample_markdown = SAMPLE_DOCUMENT.read_text(encoding="utf-8")
     
     print("✅ 示例文档创建完成")
     print(f"📊 文档长度：{len(sample_markdown)} 字符")
@@ -155,36 +236,48 @@ async def demo_complete_workflow():
     extractor = LangChainExtractor(
         provider=AIProvider.OLLAMA,
         model="qwen3:4b",
-        ollama_url="http://localhost:11434"
+        ollama_url="http://localhost:11434",
+        cache_path=get_settings().llm_cache_path if use_cache else ""
     )
     
+    # 预先加载模型，避免首次提取计入模型加载时间
+    if await extractor.warmup():
+        print("🔥 模型已预热")
+    
     print("🔄 正在分析文档并提取需求...")
     print("⏳ 这可能需要10-30秒，请稍候...")
+    if use_cache:
+        print("♻️  已启用AI响应缓存，文档未变化时将直接使用上次结果（--no-cache 可关闭）")
     
-    requirements = await extractor.extract_async(document)
+    # 按章节拆分文档，各部分并发提取后合并
+    sub_documents = split_document(document)
+    print(f"✂️  文档已拆分为 {len(sub_documents)} 个部分并发提取")
+    try:
+        requirements = await extract_parts(extractor, sub_documents)
+    finally:
+        # AI调用已完成，在事件循环结束前释放HTTP连接
+        await extractor.aclose()
+    
+    # 各部分的需求ID独立编号，合并后重新统一编号
+    for index, req in enumerate(requirements, 1):
+        req.id = f"REQ-{index:03d}"
     
     print(f"✅ 需求提取完成！共提取 {len(requirements)} 个需求")
     
     # 4. 分析提取结果
     print("\n📊 步骤4：需求分析结果")
     
-    # 按类型分组
-    functional_reqs = [r for r in requirements if r.type == "functional"]
-    non_functional_reqs = [r for r in requirements if r.type == "non_functional"]
-    user_stories = [r for r in requirements if r.type == "user_story"]
-    
-    print(f"🔧 功能需求：{len(functional_reqs)} 个")
-    print(f"⚡ 非功能需求：{len(non_functional_reqs)} 个")
-    print(f"👤 用户故事：{len(user_stories)} 个")
+    # 一次遍历统计类型和优先级分布
+    type_counts = Counter(r.type for r in requirements)
+    priority_counts = Counter(r.priority for r in requirements)
     
-    # 按优先级分组
-    high_priority = [r for r in requirements if r.priority == "high"]
-    medium_priority = [r for r in requirements if r.priority == "medium"]
-    low_priority = [r for r in requirements if r.priority == "low"]
+    print(f"🔧 功能需求：{type_counts['functional']} 个")
+    print(f"⚡ 非功能需求：{type_counts['non_functional']} 个")
+    print(f"👤 用户故事：{type_counts['user_story']} 个")
     
-    print(f"🔴 高优先级：{len(high_priority)} 个")
-    print(f"🟡 中优先级：{len(medium_priority)} 个")
-    print(f"🟢 低优先级：{len(low_priority)} 个")
+    print(f"🔴 高优先级：{priority_counts['high']} 个")
+    print(f"🟡 中优先级：{priority_counts['medium']} 个")
+    print(f"🟢 低优先级：{priority_counts['low']} 个")
     
     # 5. 展示详细需求
     print("\n📋 步骤5：详细需求展示")
@@ -233,21 +326,13 @@ async def demo_complete_workflow():
     
     # 导出为JSON
     output_file = "extracted_requirements.json"
-    requirements_data = []
-
-    for req in requirements:
-        req_dict = req.model_dump()
-        # 处理datetime序列化
-        if req_dict.get('created_at'):
-            created_at = req_dict['created_at']
-            req_dict['created_at'] = created_at.isoformat() if hasattr(created_at, 'isoformat') else str(created_at)
-        if req_dict.get('updated_at'):
-            updated_at = req_dict['updated_at']
-            req_dict['updated_at'] = updated_at.isoformat() if hasattr(updated_at, 'isoformat') else str(updated_at)
-        requirements_data.append(req_dict)
-
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(requirements_data, f, ensure_ascii=False, indent=2, default=str)
+    # mode="json"下datetime等类型已转换为可序列化的值
+    requirements_data = [req.model_dump(mode="json") for req in requirements]
+    if orjson is not None:
+        data = orjson.dumps(requirements_data, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(requirements_data, ensure_ascii=False, indent=2).encode("utf-8")
+    Path(output_file).write_bytes(data)
     
     print(f"✅ 需求已导出到: {output_file}")
     print(f"📊 统计信息:")
@@ -257,30 +342,26 @@ async def demo_complete_workflow():
     print(f"   • 用户故事: {collection.user_story_count}")
     
     # 8. 总结
-    print("\n🎉 演示完成！")
-    print("=" * 60)
-    print("✅ 成功展示了完整的需求提取流程：")
-    print("   1. 📄 Markdown文档解析")
-    print("   2. 🤖 AI智能需求提取")
-    print("   3. 📊 结构化数据输出")
-    print("   4. 🎯 质量评估和验证")
-    print("   5. 💾 结果导出和存储")
-    print("\n🆓 使用的是完全免费的本地AI方案！")
-    print("🚀 您可以开始处理真实的需求文档了！")
+    print(SUMMARY_TEXT)
 
-async def main():
+async def main(use_cache: bool = True):
     """主函数"""
     try:
-        await demo_complete_workflow()
+        await demo_complete_workflow(use_cache=use_cache)
         return 0
     except Exception as e:
         print(f"\n❌ 演示过程中出现错误: {e}")
-        print("\n🔧 故障排除建议:")
-        print("   1. 确保Ollama服务正在运行: ollama serve")
-        print("   2. 确保qwen3:4b模型已下载: ollama list")
-        print("   3. 检查网络连接和端口11434")
+        print(TROUBLESHOOTING_TEXT)
         return 1
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    arg_parser = argparse.ArgumentParser(description="TestMind AI 需求提取演示")
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用AI响应缓存，强制重新调用模型"
+    )
+    args = arg_parser.parse_args()
+    
+    exit_code = asyncio.run(main(use_cache=not args.no_cache))
     sys.exit(exit_code)
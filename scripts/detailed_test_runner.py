@@ -3,34 +3,111 @@
 详细日志测试运行器
 提供完整的测试执行日志和可视化报告
 """
+import os
+import re
+import selectors
 import sys
 import subprocess
 import logging
+import mmap
 import time
-import webbrowser
-from pathlib import Path
 from datetime import datetime
-from io import StringIO
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
+
+# 读取子进程输出的块大小
+READ_CHUNK_SIZE = 64 * 1024
+
+# 等待子进程输出的超时时间（秒）
+SELECT_TIMEOUT = 0.1
+
+# pytest输出行中的关键词（一次扫描收集所有关键词）
+LINE_TOKEN_PATTERN = re.compile(
+    r"(?P<collecting>(?i:collecting))"
+    r"|(?P<collected>collected)"
+    r"|(?P<item>item)"
+    r"|(?P<node>::)"
+    r"|(?P<PASSED>PASSED)"
+    r"|(?P<FAILED>FAILED)"
+    r"|(?P<SKIPPED>SKIPPED)"
+    r"|(?P<ERROR>ERROR)"
+    r"|(?P<Exception>Exception)"
+    r"|(?P<warning>WARNING|warning)"
+    r"|(?P<passed>passed)"
+    r"|(?P<failed>failed)"
+    r"|(?P<error_word>error)"
+    r"|(?P<fixture>(?i:setup|teardown|fixture))"
+)
+
+# 行类别 -> (日志级别, 前缀)
+LINE_LOG_LEVELS = {
+    "collecting": (logging.INFO, "🔍 "),
+    "collected": (logging.INFO, "📊 "),
+    "PASSED": (logging.INFO, "✅ "),
+    "FAILED": (logging.ERROR, "❌ "),
+    "SKIPPED": (logging.WARNING, "⏭️  "),
+    "error": (logging.ERROR, "💥 "),
+    "warning": (logging.WARNING, "⚠️  "),
+    "stats": (logging.INFO, "📈 "),
+    "fixture": (logging.DEBUG, "🔧 "),
+    "other": (logging.DEBUG, "📝 "),
+}
+
+
+def _stat_or_none(path):
+    """
+    获取文件状态
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        os.stat_result: 文件状态，文件不存在时返回None
+    """
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
 
 
 class DetailedTestRunner:
     """详细日志测试运行器"""
     
-    def __init__(self):
+    def __init__(self, save_logs=True, debug_logs=False):
+        """
+        初始化运行器
+
+        Args:
+            save_logs: 是否将详细日志写入日志文件
+            debug_logs: 是否记录DEBUG级别日志（pytest日志输出和日志文件）
+        """
         self.project_root = project_root
         self.reports_dir = self.project_root / "test_reports"
         self.reports_dir.mkdir(exist_ok=True)
-        self.log_buffer = StringIO()
+        self._last_stats_line = None
+        self.log_level = logging.DEBUG if debug_logs else logging.INFO
+        
+        # 生成本次运行的报告和日志文件路径
+        self.started_at = datetime.now()
+        timestamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        self.html_report = self.reports_dir / f"detailed_test_report_{timestamp}.html"
+        # 不保存日志时没有日志文件，报告中也不引用它
+        self.log_file = self.reports_dir / f"test_execution_{timestamp}.log" if save_logs else None
         
         # 设置日志
-        self.setup_logging()
+        self.setup_logging(save_logs)
     
-    def setup_logging(self):
-        """设置详细日志"""
+    def setup_logging(self, save_logs=True):
+        """
+        设置详细日志
+
+        Args:
+            save_logs: 是否添加日志文件处理器（日志直接写入磁盘，不在内存中缓冲）
+        """
         # 创建日志格式
         formatter = logging.Formatter(
             '%(asctime)s [%(levelname)8s] %(name)s: %(message)s',
@@ -42,32 +119,31 @@ class DetailedTestRunner:
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
         
-        # 字符串缓冲处理器（用于保存日志）
-        buffer_handler = logging.StreamHandler(self.log_buffer)
-        buffer_handler.setLevel(logging.DEBUG)
-        buffer_handler.setFormatter(formatter)
-        
         # 配置根日志器
         root_logger = logging.getLogger()
         root_logger.setLevel(logging.DEBUG)
         root_logger.addHandler(console_handler)
-        root_logger.addHandler(buffer_handler)
+        
+        # 文件处理器（保存完整的DEBUG日志）
+        if save_logs:
+            file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
+            file_handler.setLevel(self.log_level)
+            file_handler.setFormatter(formatter)
+            root_logger.addHandler(file_handler)
         
         # 创建测试专用日志器
         self.logger = logging.getLogger('TestRunner')
     
-    def run_detailed_tests(self, test_level="all", open_browser=True, save_logs=True):
+    def run_detailed_tests(self, test_level="all", open_browser=True):
         """运行带详细日志的测试"""
         self.logger.info("🔍 TestMind AI - 详细日志测试运行器")
         self.logger.info("=" * 60)
         self.logger.info(f"测试级别: {test_level}")
-        self.logger.info(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.logger.info(f"开始时间: {self.started_at:%Y-%m-%d %H:%M:%S}")
         self.logger.info(f"工作目录: {self.project_root}")
         
-        # 生成时间戳
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        html_report = self.reports_dir / f"detailed_test_report_{timestamp}.html"
-        log_file = self.reports_dir / f"test_execution_{timestamp}.log"
+        html_report = self.html_report
+        log_file = self.log_file
         
         # 确定测试文件
         test_files, test_name = self._get_test_files(test_level)
@@ -75,28 +151,25 @@ class DetailedTestRunner:
         self.logger.info(f"📋 执行测试: {test_name}")
         self.logger.info(f"📁 测试文件: {', '.join(test_files)}")
         self.logger.info(f"📊 HTML报告: {html_report.name}")
-        self.logger.info(f"📝 日志文件: {log_file.name}")
+        if log_file is not None:
+            self.logger.info(f"📝 日志文件: {log_file.name}")
         
         # 构建pytest命令
-        cmd = self._build_pytest_command(test_files, html_report)
+        cmd = self._build_pytest_command(test_files, html_report, logging.getLevelName(self.log_level))
         
         self.logger.info("🚀 开始执行测试...")
         self.logger.debug(f"执行命令: {' '.join(cmd)}")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             # 执行测试并实时显示输出
-            result = self._run_pytest_with_logging(cmd)
+            returncode = self._run_pytest_with_logging(cmd)
             
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             
             # 记录执行结果
-            self._log_execution_results(result, duration)
-            
-            # 保存日志文件
-            if save_logs:
-                self._save_log_file(log_file)
+            self._log_execution_results(returncode, duration)
             
             # 生成增强的HTML报告
             self._enhance_html_report(html_report, log_file)
@@ -104,7 +177,7 @@ class DetailedTestRunner:
             # 显示报告信息
             self._display_report_info(html_report, log_file, open_browser)
             
-            return result.returncode == 0
+            return returncode == 0
             
         except Exception as e:
             self.logger.error(f"💥 测试执行异常: {e}")
@@ -128,8 +201,15 @@ class DetailedTestRunner:
                 "完整测试套件"
             )
     
-    def _build_pytest_command(self, test_files, html_report):
-        """构建pytest命令"""
+    def _build_pytest_command(self, test_files, html_report, log_level="INFO"):
+        """
+        构建pytest命令
+
+        Args:
+            test_files: 测试文件列表
+            html_report: HTML报告路径
+            log_level: pytest实时日志级别（DEBUG日志量大，仅在需要时开启）
+        """
         return [
             sys.executable, "-m", "pytest",
             *test_files,
@@ -138,50 +218,93 @@ class DetailedTestRunner:
             "--capture=no",  # 不捕获输出
             f"--html={html_report}",
             "--self-contained-html",
-            "--log-cli-level=DEBUG",  # 显示DEBUG级别日志
+            f"--log-cli-level={log_level}",
             "--log-cli-format=%(asctime)s [%(levelname)8s] %(name)s: %(message)s",
             "--log-cli-date-format=%Y-%m-%d %H:%M:%S"
         ]
     
     def _run_pytest_with_logging(self, cmd):
-        """运行pytest并记录详细日志"""
+        """
+        运行pytest并记录详细日志
+
+        Args:
+            cmd: pytest命令
+
+        Returns:
+            int: pytest返回码
+        """
         self.logger.info("📋 开始收集测试...")
         
-        # 启动进程
+        # 启动进程（以二进制方式读取输出，按块读取后批量解码）
         process = subprocess.Popen(
             cmd,
             cwd=self.project_root,
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            stderr=subprocess.STDOUT
         )
         
-        # 实时读取和记录输出
-        output_lines = []
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
-            
-            if line:
-                line = line.rstrip()
-                output_lines.append(line)
-                
-                # 解析并记录不同类型的输出
-                self._parse_and_log_line(line)
+        # 实时读取和记录输出（只保留最后一行统计信息，不保存全部输出）
+        self._last_stats_line = None
+        pending = b""
+        for chunk in self._iter_output_chunks(process):
+            # 只处理完整的行，不完整的尾部留到下一块
+            complete, newline, pending = (pending + chunk).rpartition(b"\n")
+            if newline:
+                self._process_output_lines(complete.decode("utf-8", "replace").split("\n"))
         
-        # 等待进程完成
-        return_code = process.wait()
+        if pending:
+            self._process_output_lines([pending.decode("utf-8", "replace")])
+        process.stdout.close()
         
-        # 创建结果对象
-        class Result:
-            def __init__(self, returncode, stdout):
-                self.returncode = returncode
-                self.stdout = stdout
+        # 等待进程完成
+        return process.wait()
+    
+    @staticmethod
+    def _iter_output_chunks(process):
+        """
+        按块读取子进程输出，直到输出结束
+
+        POSIX系统上先用selector等待数据（带超时），等待期间可及时响应Ctrl+C等信号；
+        Windows的管道不支持select，直接阻塞读取
+
+        Args:
+            process: 子进程（stdout为二进制管道）
+
+        Yields:
+            bytes: 读取到的输出块
+        """
+        fd = process.stdout.fileno()
+        if sys.platform == "win32":
+            while chunk := os.read(fd, READ_CHUNK_SIZE):
+                yield chunk
+            return
         
-        return Result(return_code, '\n'.join(output_lines))
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while True:
+                if not selector.select(timeout=SELECT_TIMEOUT):
+                    continue
+                chunk = os.read(fd, READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    
+    def _process_output_lines(self, lines):
+        """
+        解析并记录一批输出行
+
+        Args:
+            lines: 本次读取到的输出行
+        """
+        for line in lines:
+            line = line.rstrip()
+            
+            # 记住最近的测试统计行（如 "5 passed in 1.2s"）
+            if 'passed' in line and ('failed' in line or 'error' in line or line.endswith('passed')):
+                self._last_stats_line = line
+            
+            # 解析并记录不同类型的输出
+            self._parse_and_log_line(line)
     
     def _parse_and_log_line(self, line):
         """解析并记录pytest输出行"""
@@ -189,76 +312,83 @@ class DetailedTestRunner:
         if not line:
             return
         
+        level, prefix = LINE_LOG_LEVELS[self._classify_line(line)]
+        self.logger.log(level, f"{prefix}{line}")
+    
+    @staticmethod
+    def _classify_line(line):
+        """
+        判断输出行的类别（单次正则扫描收集关键词，再按优先级判断）
+
+        Args:
+            line: 去除首尾空白的输出行
+
+        Returns:
+            str: 行类别，对应LINE_LOG_LEVELS中的键
+        """
+        tokens = {match.lastgroup for match in LINE_TOKEN_PATTERN.finditer(line)}
+        
         # 测试收集阶段
-        if "collecting" in line.lower():
-            self.logger.info(f"🔍 {line}")
-        elif "collected" in line and "item" in line:
-            self.logger.info(f"📊 {line}")
+        if "collecting" in tokens:
+            return "collecting"
+        if "collected" in tokens and "item" in tokens:
+            return "collected"
         
         # 测试执行阶段
-        elif "::" in line and any(status in line for status in ["PASSED", "FAILED", "SKIPPED"]):
-            if "PASSED" in line:
-                self.logger.info(f"✅ {line}")
-            elif "FAILED" in line:
-                self.logger.error(f"❌ {line}")
-            elif "SKIPPED" in line:
-                self.logger.warning(f"⏭️  {line}")
+        if "node" in tokens:
+            for status in ("PASSED", "FAILED", "SKIPPED"):
+                if status in tokens:
+                    return status
         
         # 错误和异常
-        elif "ERROR" in line or "Exception" in line:
-            self.logger.error(f"💥 {line}")
-        elif "WARNING" in line or "warning" in line:
-            self.logger.warning(f"⚠️  {line}")
+        if "ERROR" in tokens or "Exception" in tokens:
+            return "error"
+        if "warning" in tokens:
+            return "warning"
         
         # 测试统计
-        elif "passed" in line and ("failed" in line or "error" in line or line.endswith("passed")):
-            self.logger.info(f"📈 {line}")
+        if "passed" in tokens and ("failed" in tokens or "error_word" in tokens or line.endswith("passed")):
+            return "stats"
         
         # 其他重要信息
-        elif any(keyword in line.lower() for keyword in ["setup", "teardown", "fixture"]):
-            self.logger.debug(f"🔧 {line}")
-        else:
-            # 一般输出
-            self.logger.debug(f"📝 {line}")
+        if "fixture" in tokens:
+            return "fixture"
+        return "other"
     
-    def _log_execution_results(self, result, duration):
-        """记录执行结果"""
+    def _log_execution_results(self, returncode, duration):
+        """
+        记录执行结果
+
+        Args:
+            returncode: pytest返回码
+            duration: 执行耗时（秒）
+        """
         self.logger.info("=" * 60)
         self.logger.info("📊 测试执行完成")
         self.logger.info("=" * 60)
         self.logger.info(f"⏱️  执行时间: {duration:.2f}秒")
-        self.logger.info(f"📊 返回码: {result.returncode}")
+        self.logger.info(f"📊 返回码: {returncode}")
         
-        if result.returncode == 0:
+        if returncode == 0:
             self.logger.info("🎉 所有测试通过!")
         else:
             self.logger.warning("⚠️  部分测试失败")
         
-        # 解析测试统计
-        output_lines = result.stdout.split('\n')
-        stats_line = [line for line in output_lines if 'passed' in line and ('failed' in line or 'error' in line or line.endswith('passed'))]
-        
-        if stats_line:
-            self.logger.info(f"📈 测试统计: {stats_line[-1].strip()}")
-    
-    def _save_log_file(self, log_file):
-        """保存日志文件"""
-        try:
-            log_content = self.log_buffer.getvalue()
-            with open(log_file, 'w', encoding='utf-8') as f:
-                f.write(log_content)
-            self.logger.info(f"💾 日志已保存: {log_file}")
-        except Exception as e:
-            self.logger.error(f"❌ 保存日志失败: {e}")
+        # 测试统计（读取过程中已记录）
+        if self._last_stats_line:
+            self.logger.info(f"📈 测试统计: {self._last_stats_line.strip()}")
     
     def _enhance_html_report(self, html_report, log_file):
         """增强HTML报告，添加日志链接"""
         try:
-            if not html_report.exists():
+            # 报告不存在或为空时跳过（空文件无法mmap）
+            report_stat = _stat_or_none(html_report)
+            if report_stat is None or report_stat.st_size == 0:
                 return
             
-            with open(html_report, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            # 未保存日志文件时不添加链接
+            if log_file is None:
+                return
             
             # 添加日志链接
             log_section = f"""
@@ -269,11 +399,16 @@ class DetailedTestRunner:
 </div>
 """
             
-            # 插入日志部分
-            html_content = html_content.replace('<body>', f'<body>{log_section}')
-            
-            with open(html_report, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # 在<body>之后插入日志部分：按字节定位，只重写插入点之后的内容
+            with open(html_report, 'r+b') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    body_index = mm.find(b'<body>')
+                    if body_index == -1:
+                        return
+                    insert_at = body_index + len(b'<body>')
+                    tail = mm[insert_at:]
+                f.seek(insert_at)
+                f.write(log_section.encode('utf-8') + tail)
                 
         except Exception as e:
             self.logger.error(f"⚠️ 增强HTML报告失败: {e}")
@@ -282,16 +417,22 @@ class DetailedTestRunner:
         """显示报告信息"""
         self.logger.info("📁 生成的文件:")
         self.logger.info(f"  📊 HTML报告: {html_report}")
-        self.logger.info(f"  📝 执行日志: {log_file}")
+        if log_file is not None:
+            self.logger.info(f"  📝 执行日志: {log_file}")
+        
+        # 每个文件只stat一次
+        html_stat = _stat_or_none(html_report)
+        log_stat = _stat_or_none(log_file) if log_file is not None else None
         
-        if html_report.exists():
-            self.logger.info(f"  📏 HTML大小: {html_report.stat().st_size / 1024:.1f} KB")
+        if html_stat is not None:
+            self.logger.info(f"  📏 HTML大小: {html_stat.st_size / 1024:.1f} KB")
         
-        if log_file.exists():
-            self.logger.info(f"  📏 日志大小: {log_file.stat().st_size / 1024:.1f} KB")
+        if log_stat is not None:
+            self.logger.info(f"  📏 日志大小: {log_stat.st_size / 1024:.1f} KB")
         
-        if open_browser and html_report.exists():
+        if open_browser and html_stat is not None:
             self.logger.info("🌐 正在打开HTML报告...")
+            import webbrowser
             webbrowser.open(f"file://{html_report.absolute()}")
         else:
             self.logger.info(f"💡 手动打开报告: file://{html_report.absolute()}")
@@ -318,19 +459,24 @@ def main():
         action="store_true",
         help="不保存日志文件"
     )
+    parser.add_argument(
+        "--debug-logs",
+        action="store_true",
+        help="记录DEBUG级别日志（输出量较大）"
+    )
     
     args = parser.parse_args()
     
-    runner = DetailedTestRunner()
+    runner = DetailedTestRunner(save_logs=not args.no_logs, debug_logs=args.debug_logs)
     success = runner.run_detailed_tests(
         test_level=args.level,
-        open_browser=not args.no_browser,
-        save_logs=not args.no_logs
+        open_browser=not args.no_browser
     )
     
     if success:
         print("\n🎉 测试执行成功！")
-        print("💡 提示: 查看日志文件了解详细执行过程")
+        if runner.log_file is not None:
+            print("💡 提示: 查看日志文件了解详细执行过程")
         return 0
     else:
         print("\n⚠️  测试执行失败，请查看日志了解详情")
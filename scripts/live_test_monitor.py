@@ -3,17 +3,43 @@
 实时测试监控器
 在终端中显示美观的实时测试进度和结果
 """
+import os
 import sys
 import time
 import subprocess
-from pathlib import Path
 from datetime import datetime
 import threading
 import re
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
+
+# pytest输出解析（模块级预编译）
+RESULT_PATTERN = re.compile(r"::([^:\s]+).*?(PASSED|FAILED|SKIPPED)")
+COLLECTING_PATTERN = re.compile(r"collecting", re.IGNORECASE)
+COLLECTED_PATTERN = re.compile(r"collected (\d+) item")
+
+# 测试结果 -> 带颜色的显示文本（预先拼接好ANSI颜色码）
+RESULT_LABELS = {
+    "PASSED": "\033[92m✅ PASSED\033[0m",     # 绿色
+    "FAILED": "\033[91m❌ FAILED\033[0m",     # 红色
+    "SKIPPED": "\033[93m⏭️  SKIPPED\033[0m",  # 黄色
+}
+UNKNOWN_RESULT_LABEL = "\033[94m❓ UNKNOWN\033[0m"  # 蓝色
+
+# 每次从管道读取的字节数
+READ_CHUNK_SIZE = 64 * 1024
+
+
+# 进度条宽度及所有可能状态（预先构建，按填充长度直接查表）
+PROGRESS_BAR_WIDTH = 30
+PROGRESS_BARS = tuple(
+    f"[{'█' * filled}{'░' * (PROGRESS_BAR_WIDTH - filled)}]"
+    for filled in range(PROGRESS_BAR_WIDTH + 1)
+)
 
 
 class LiveTestMonitor:
@@ -24,7 +50,12 @@ class LiveTestMonitor:
         self.tests_completed = 0
         self.tests_total = 0
         self.current_test = ""
-        self.results = []
+        # 结果计数（只保留失败测试的名称）
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.failed_names = []
+        self.start_time = time.perf_counter()
         
     def run_with_monitor(self, test_level: str = "all"):
         """运行带监控的测试"""
@@ -54,7 +85,7 @@ class LiveTestMonitor:
         print(f"⏰ 开始时间: {datetime.now().strftime('%H:%M:%S')}")
         print()
         
-        start_time = time.time()
+        self.start_time = time.perf_counter()
         
         try:
             # 启动pytest进程
@@ -62,10 +93,7 @@ class LiveTestMonitor:
                 cmd,
                 cwd=self.project_root,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                stderr=subprocess.STDOUT
             )
             
             # 实时监控输出
@@ -73,7 +101,7 @@ class LiveTestMonitor:
             
             # 等待进程完成
             return_code = process.wait()
-            duration = time.time() - start_time
+            duration = time.perf_counter() - self.start_time
             
             # 显示最终结果
             self._display_final_results(return_code, duration)
@@ -86,67 +114,79 @@ class LiveTestMonitor:
     
     def _monitor_output(self, process):
         """监控pytest输出"""
-        for line in iter(process.stdout.readline, ''):
-            line = line.strip()
-            if not line:
+        for raw_line in self._iter_output_lines(process.stdout):
+            raw_line = raw_line.strip()
+            if not raw_line:
                 continue
+            line = raw_line.decode("utf-8", "replace")
             
-            # 解析测试进度
-            if "::" in line and ("PASSED" in line or "FAILED" in line or "SKIPPED" in line):
-                self._parse_test_result(line)
-            elif "collecting" in line.lower():
+            # 解析测试进度（一次匹配同时取得测试名称和结果）
+            result_match = RESULT_PATTERN.search(line)
+            if result_match:
+                self._parse_test_result(*result_match.groups())
+            elif COLLECTING_PATTERN.search(line):
                 print("🔍 正在收集测试...")
-            elif "collected" in line and "item" in line:
+            else:
                 # 提取测试总数
-                match = re.search(r'collected (\d+) item', line)
+                match = COLLECTED_PATTERN.search(line)
                 if match:
                     self.tests_total = int(match.group(1))
                     print(f"📊 发现 {self.tests_total} 个测试")
                     print()
     
-    def _parse_test_result(self, line):
-        """解析单个测试结果"""
+    @staticmethod
+    def _iter_output_lines(stream):
+        """
+        按块读取二进制输出并切分为行
+
+        Args:
+            stream: 子进程的二进制输出管道
+
+        Returns:
+            Iterator[bytes]: 未解码的输出行（不含换行符）
+        """
+        fd = stream.fileno()
+        leftover = b""
+        while True:
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            *lines, leftover = (leftover + chunk).split(b"\n")
+            yield from lines
+        if leftover:
+            yield leftover
+    
+    def _parse_test_result(self, test_name, outcome):
+        """
+        记录并显示单个测试结果
+
+        Args:
+            test_name: 测试名称
+            outcome: 测试结果（PASSED/FAILED/SKIPPED）
+        """
         self.tests_completed += 1
-        
-        # 提取测试名称和结果
-        if "PASSED" in line:
-            status = "✅ PASSED"
-            color = "\033[92m"  # 绿色
-        elif "FAILED" in line:
-            status = "❌ FAILED"
-            color = "\033[91m"  # 红色
-        elif "SKIPPED" in line:
-            status = "⏭️  SKIPPED"
-            color = "\033[93m"  # 黄色
-        else:
-            status = "❓ UNKNOWN"
-            color = "\033[94m"  # 蓝色
-        
-        # 提取测试名称
-        test_name = line.split("::")[1].split()[0] if "::" in line else "Unknown"
+        label = RESULT_LABELS.get(outcome, UNKNOWN_RESULT_LABEL)
         
         # 计算进度
-        progress = (self.tests_completed / max(self.tests_total, 1)) * 100
-        progress_bar = self._create_progress_bar(progress)
+        total = max(self.tests_total, 1)
+        progress = (self.tests_completed / total) * 100
+        progress_bar = PROGRESS_BARS[min(self.tests_completed * PROGRESS_BAR_WIDTH // total, PROGRESS_BAR_WIDTH)]
         
-        # 显示结果
-        reset_color = "\033[0m"
-        print(f"{color}{status}{reset_color} {test_name}")
-        print(f"📈 进度: {progress_bar} {self.tests_completed}/{self.tests_total} ({progress:.1f}%)")
-        print()
+        # 显示结果（合并为一次写入）
+        sys.stdout.write(
+            f"{label} {test_name}\n"
+            f"📈 进度: {progress_bar} {self.tests_completed}/{self.tests_total} ({progress:.1f}%)\n\n"
+        )
+        sys.stdout.flush()
         
         # 记录结果
-        self.results.append({
-            'name': test_name,
-            'status': status,
-            'timestamp': datetime.now()
-        })
-    
-    def _create_progress_bar(self, percentage, width=30):
-        """创建进度条"""
-        filled = int(width * percentage / 100)
-        bar = "█" * filled + "░" * (width - filled)
-        return f"[{bar}]"
+        if outcome == "PASSED":
+            self.passed += 1
+        elif outcome == "FAILED":
+            self.failed += 1
+            self.failed_names.append(test_name)
+        elif outcome == "SKIPPED":
+            self.skipped += 1
     
     def _display_final_results(self, return_code, duration):
         """显示最终结果"""
@@ -154,18 +194,14 @@ class LiveTestMonitor:
         print("📊 测试执行完成")
         print("=" * 60)
         
-        # 统计结果
-        passed = sum(1 for r in self.results if "PASSED" in r['status'])
-        failed = sum(1 for r in self.results if "FAILED" in r['status'])
-        skipped = sum(1 for r in self.results if "SKIPPED" in r['status'])
-        
         # 显示统计
+        total = self.passed + self.failed + self.skipped
         print(f"⏱️  执行时间: {duration:.2f}秒")
-        print(f"📈 总测试数: {len(self.results)}")
-        print(f"✅ 通过: {passed}")
-        print(f"❌ 失败: {failed}")
-        print(f"⏭️  跳过: {skipped}")
-        print(f"🎯 成功率: {(passed / max(len(self.results), 1) * 100):.1f}%")
+        print(f"📈 总测试数: {total}")
+        print(f"✅ 通过: {self.passed}")
+        print(f"❌ 失败: {self.failed}")
+        print(f"⏭️  跳过: {self.skipped}")
+        print(f"🎯 成功率: {(self.passed / max(total, 1) * 100):.1f}%")
         
         # 显示最终状态
         if return_code == 0:
@@ -174,11 +210,10 @@ class LiveTestMonitor:
             print("\n⚠️  部分测试失败，请检查详细信息。")
         
         # 显示失败的测试
-        if failed > 0:
+        if self.failed_names:
             print("\n❌ 失败的测试:")
-            for result in self.results:
-                if "FAILED" in result['status']:
-                    print(f"  - {result['name']}")
+            for name in self.failed_names:
+                print(f"  - {name}")
 
 
 def main():
@@ -3,25 +3,33 @@
 快速文档解析功能测试脚本
 专门用于快速验证三种文档格式的解析功能
 """
+import asyncio
 import sys
 import time
-import tempfile
-from pathlib import Path
+from functools import lru_cache
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    import _bootstrap  # noqa: F401
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts import _bootstrap  # noqa: F401
 
+import httpx
 from fastapi.testclient import TestClient
 from app.main import create_app
 
 
+@lru_cache(maxsize=1)
+def get_client():
+    """获取共享的测试客户端（应用只创建一次）"""
+    return TestClient(create_app())
+
+
 def test_markdown_parsing():
     """测试Markdown解析"""
     print("📝 测试Markdown解析...")
     
-    app = create_app()
-    client = TestClient(app)
+    client = get_client()
     
     # 创建测试Markdown内容
     markdown_content = """
@@ -39,46 +47,34 @@ def test_markdown_parsing():
 作为一个新用户，我希望能够快速注册账号，以便开始使用系统。
 """
     
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(markdown_content)
-        temp_file = f.name
+    start_time = time.time()
     
-    try:
-        start_time = time.time()
-        
-        with open(temp_file, 'rb') as f:
-            response = client.post(
-                "/api/v1/requirements/parse",
-                files={"file": ("test.md", f, "text/markdown")},
-                data={"ai_provider": "mock"}
-            )
-        
-        duration = time.time() - start_time
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"  ✅ Markdown解析成功 ({duration:.2f}s)")
-            print(f"     文档标题: {data['document']['title']}")
-            print(f"     章节数量: {len(data['document']['sections'])}")
-            print(f"     提取需求: {len(data['requirements'])}个")
-            return True
-        else:
-            print(f"  ❌ Markdown解析失败: {response.status_code}")
-            print(f"     错误信息: {response.text}")
-            return False
-            
-    finally:
-        import os
-        os.unlink(temp_file)
+    # 直接上传内存中的内容，无需写入临时文件
+    response = client.post(
+        "/api/v1/requirements/parse",
+        files={"file": ("test.md", markdown_content.encode("utf-8"), "text/markdown")},
+        data={"ai_provider": "mock"}
+    )
+    
+    duration = time.time() - start_time
+    
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  ✅ Markdown解析成功 ({duration:.2f}s)")
+        print(f"     文档标题: {data['document']['title']}")
+        print(f"     章节数量: {len(data['document']['sections'])}")
+        print(f"     提取需求: {len(data['requirements'])}个")
+        return True
+    else:
+        print(f"  ❌ Markdown解析失败: {response.status_code}")
+        print(f"     错误信息: {response.text}")
+        return False
 
 
 def test_pdf_parsing():
     """测试PDF解析（模拟）"""
     print("📄 测试PDF解析...")
     
-    app = create_app()
-    client = TestClient(app)
-    
     # 由于无法在测试中创建真实PDF，我们测试PDF解析器的文本处理能力
     from app.requirements_parser.parsers.pdf_parser import PDFParser
     
@@ -152,22 +148,38 @@ def test_word_parsing():
         return False
 
 
+async def _fetch_concurrently(*paths):
+    """
+    通过ASGI传输并发请求多个GET端点（不经过网络）
+
+    Args:
+        *paths: 请求路径
+
+    Returns:
+        list: 与路径顺序一致的响应列表
+    """
+    transport = httpx.ASGITransport(app=get_client().app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        return await asyncio.gather(*(client.get(path) for path in paths))
+
+
 def test_api_endpoints():
     """测试API端点"""
     print("🔗 测试API端点...")
     
-    app = create_app()
-    client = TestClient(app)
-    
     try:
+        # 健康检查和格式支持查询相互独立，并发请求
+        health_response, response = asyncio.run(_fetch_concurrently(
+            "/health",
+            "/api/v1/requirements/formats"
+        ))
+        
         # 测试健康检查
-        response = client.get("/health")
-        if response.status_code != 200:
-            print(f"  ❌ 健康检查失败: {response.status_code}")
+        if health_response.status_code != 200:
+            print(f"  ❌ 健康检查失败: {health_response.status_code}")
             return False
         
         # 测试格式支持查询
-        response = client.get("/api/v1/requirements/formats")
         if response.status_code != 200:
             print(f"  ❌ 格式查询失败: {response.status_code}")
             return False
@@ -7,14 +7,51 @@ import argparse
 import time
 import json
 import sys
-from pathlib import Path
 from datetime import datetime
 import subprocess
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque
+from pathlib import Path
 import psutil
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
+
+def _dump_json_bytes(data) -> bytes:
+    """序列化为格式化的JSON字节（安装了orjson时优先使用）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# 测试结果中保留的pytest输出行数（只保留末尾部分）
+OUTPUT_TAIL_LINES = 2000
+
+# pytest未收集到任何测试时的退出码（pytest.ExitCode.NO_TESTS_COLLECTED）
+NO_TESTS_COLLECTED = 5
+
+
+# 测试级别配置：级别 -> (测试类, 名称, 预计耗时, 失败提示)
+TEST_LEVELS = {
+    "1": ("TestLevel1QuickValidation", "快速验证测试", "< 30秒",
+          "Level 1失败表示基础功能有问题，请检查API和核心解析器"),
+    "2": ("TestLevel2ComprehensiveFunctionality", "全面功能测试", "2-5分钟",
+          "Level 2失败表示复杂场景处理有问题，请检查错误处理和边界情况"),
+    "3": ("TestLevel3PerformanceStress", "性能压力测试", "5-10分钟",
+          "Level 3失败表示性能不达标，请优化算法和资源使用"),
+    "4": ("TestLevel4UserAcceptance", "用户验收测试", "端到端场景",
+          "Level 4失败表示用户体验有问题，请检查端到端流程"),
+}
 
 
 class ProductionTestRunner:
@@ -43,7 +80,7 @@ class ProductionTestRunner:
         if level == "all":
             self._run_all_levels()
         else:
-            self._run_specific_level(level)
+            self.test_results.append(self._run_specific_level(level))
         
         # 生成报告
         self._generate_report()
@@ -87,56 +124,209 @@ class ProductionTestRunner:
         
         print("📝 创建基础测试数据完成")
     
-    def _run_all_levels(self):
-        """运行所有级别的测试"""
-        levels = [
-            ("1", "快速验证测试", "< 30秒"),
-            ("2", "全面功能测试", "2-5分钟"),
-            ("3", "性能压力测试", "5-10分钟"),
-            ("4", "用户验收测试", "端到端场景")
-        ]
-        
-        for level, name, duration in levels:
-            print(f"\n📋 Level {level}: {name} (预计耗时: {duration})")
-            print("-" * 50)
-            self._run_specific_level(level)
-    
-    def _run_specific_level(self, level: str):
-        """运行特定级别的测试"""
-        test_file = self.project_root / "tests" / "integration" / "test_document_parsing_production.py"
-        
-        if not test_file.exists():
-            print(f"❌ 测试文件不存在: {test_file}")
-            return
-        
-        # 构建pytest命令
-        cmd = [
+    @property
+    def test_file(self) -> Path:
+        """生产级测试文件路径"""
+        return self.project_root / "tests" / "integration" / "test_document_parsing_production.py"
+
+    def _build_pytest_command(self, keyword: str) -> list:
+        """
+        构建pytest命令
+
+        Args:
+            keyword: -k 过滤表达式
+
+        Returns:
+            list: pytest命令参数
+        """
+        return [
             sys.executable, "-m", "pytest",
-            str(test_file),
+            str(self.test_file),
             "-v",
-            "--tb=short"
+            "--tb=short",
+            "-k", keyword
         ]
 
-        if level == "1":
-            cmd.append("-k TestLevel1QuickValidation")
-        elif level == "2":
-            cmd.append("-k TestLevel2ComprehensiveFunctionality")
-        elif level == "3":
-            cmd.append("-k TestLevel3PerformanceStress")
-        elif level == "4":
-            cmd.append("-k TestLevel4UserAcceptance")
+    def _run_all_levels(self):
+        """
+        运行所有级别的测试（单次pytest调用，只收集一次测试）
+
+        各级别的耗时为该级别测试用例耗时（JUnit XML中的time）之和，
+        不包含测试收集和插件加载时间；pytest的总耗时单独输出
+        """
+        for level, (_, name, duration, _) in TEST_LEVELS.items():
+            print(f"📋 Level {level}: {name} (预计耗时: {duration})")
+        print("-" * 50)
+
+        if not self.test_file.exists():
+            print(f"❌ 测试文件不存在: {self.test_file}")
+            self.test_results.extend(
+                self._error_result(level, 0, f"测试文件不存在: {self.test_file}")
+                for level in TEST_LEVELS
+            )
+            return
+
+        keyword = " or ".join(test_class for test_class, _, _, _ in TEST_LEVELS.values())
+        timeout = 600 * len(TEST_LEVELS)
+        start_time = time.time()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            junit_file = Path(tmp_dir) / "production_tests.xml"
+            cmd = self._build_pytest_command(keyword) + [f"--junitxml={junit_file}"]
+
+            try:
+                self._stream_pytest(cmd, timeout)
+                wall_time = time.time() - start_time
+                level_cases = self._parse_junit_levels(junit_file)
+            except subprocess.TimeoutExpired:
+                print("⏰ 测试超时")
+                self.test_results.extend(
+                    self._error_result(level, timeout, "测试超时") for level in TEST_LEVELS
+                )
+                return
+            except Exception as e:
+                print(f"💥 测试执行异常: {e}")
+                self.test_results.extend(
+                    self._error_result(level, time.time() - start_time, str(e))
+                    for level in TEST_LEVELS
+                )
+                return
+
+        print(f"\n⏱️  pytest总耗时: {wall_time:.1f}秒（各级别耗时为其测试用例耗时之和）")
+        for level in TEST_LEVELS:
+            cases = level_cases.get(level, [])
+            duration = sum(case_time for case_time, _ in cases)
+            failures = sum(1 for _, failed in cases if failed)
+            success = bool(cases) and failures == 0
+
+            if not cases:
+                return_code = NO_TESTS_COLLECTED
+            else:
+                return_code = 0 if success else 1
+
+            self.test_results.append({
+                "level": level,
+                "duration": duration,
+                "return_code": return_code,
+                "tests": len(cases),
+                "failures": failures,
+                "success": success,
+                "no_tests": not cases
+            })
+            self._print_level_result(level, success, not cases, duration)
+
+    @staticmethod
+    def _print_level_result(level: str, success: bool, no_tests: bool, duration: float):
+        """输出单个级别的测试结果"""
+        if no_tests:
+            print(f"⚪ Level {level} 未收集到测试")
+        elif success:
+            print(f"✅ Level {level} 测试通过 (耗时: {duration:.1f}秒)")
+        else:
+            print(f"❌ Level {level} 测试失败 (耗时: {duration:.1f}秒)")
+
+    def _stream_pytest(self, cmd: list, timeout: float) -> tuple:
+        """
+        执行pytest并实时输出，只在内存中保留输出末尾部分
+
+        Args:
+            cmd: pytest命令参数
+            timeout: 超时时间（秒），超时后终止进程
+
+        Returns:
+            tuple: (返回码, 输出末尾的文本)
+
+        Raises:
+            subprocess.TimeoutExpired: 执行超时
+        """
+        process = subprocess.Popen(
+            cmd,
+            cwd=self.project_root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        try:
+            for line in process.stdout:
+                print(line, end="")
+                tail.append(line.rstrip("\n"))
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return returncode, "\n".join(tail)
+
+    @staticmethod
+    def _parse_junit_levels(junit_file: Path) -> dict:
+        """
+        按测试类解析JUnit XML结果
+
+        Args:
+            junit_file: JUnit XML文件路径
+
+        Returns:
+            dict: 级别 -> [(耗时, 是否失败), ...]
+        """
+        class_levels = {test_class: level for level, (test_class, _, _, _) in TEST_LEVELS.items()}
+        level_cases = defaultdict(list)
+
+        for testcase in ET.parse(junit_file).getroot().iter("testcase"):
+            test_class = testcase.get("classname", "").rpartition(".")[2]
+            level = class_levels.get(test_class)
+            if level is None:
+                continue
+            failed = testcase.find("failure") is not None or testcase.find("error") is not None
+            level_cases[level].append((float(testcase.get("time", 0)), failed))
+
+        return level_cases
+
+    @staticmethod
+    def _error_result(level: str, duration: float, error: str) -> dict:
+        """构建执行失败时的测试结果"""
+        return {
+            "level": level,
+            "duration": duration,
+            "return_code": -1,
+            "success": False,
+            "error": error
+        }
+    
+    def _run_specific_level(self, level: str) -> dict:
+        """
+        运行特定级别的测试
+
+        Args:
+            level: 测试级别
+
+        Returns:
+            dict: 该级别的测试结果
+        """
+        if not self.test_file.exists():
+            print(f"❌ 测试文件不存在: {self.test_file}")
+            return self._error_result(level, 0, f"测试文件不存在: {self.test_file}")
+        
+        # 构建pytest命令
+        cmd = self._build_pytest_command(TEST_LEVELS[level][0])
         
         start_time = time.time()
         
         try:
             # 执行测试
-            result = subprocess.run(
-                cmd,
-                cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10分钟超时
-            )
+            returncode, output = self._stream_pytest(cmd, timeout=600)  # 10分钟超时
             
             duration = time.time() - start_time
             
@@ -144,41 +334,26 @@ class ProductionTestRunner:
             test_result = {
                 "level": level,
                 "duration": duration,
-                "return_code": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "success": result.returncode == 0
+                "return_code": returncode,
+                "stdout": output,
+                "success": returncode == 0,
+                "no_tests": returncode == NO_TESTS_COLLECTED
             }
             
-            self.test_results.append(test_result)
-            
             # 显示结果
-            if result.returncode == 0:
-                print(f"✅ Level {level} 测试通过 (耗时: {duration:.1f}秒)")
-            else:
-                print(f"❌ Level {level} 测试失败 (耗时: {duration:.1f}秒)")
-                print("错误输出:")
-                print(result.stderr)
+            self._print_level_result(
+                level, test_result["success"], test_result["no_tests"], duration
+            )
+
+            return test_result
             
         except subprocess.TimeoutExpired:
             print(f"⏰ Level {level} 测试超时")
-            self.test_results.append({
-                "level": level,
-                "duration": 600,
-                "return_code": -1,
-                "success": False,
-                "error": "测试超时"
-            })
+            return self._error_result(level, 600, "测试超时")
         
         except Exception as e:
             print(f"💥 Level {level} 测试执行异常: {e}")
-            self.test_results.append({
-                "level": level,
-                "duration": 0,
-                "return_code": -1,
-                "success": False,
-                "error": str(e)
-            })
+            return self._error_result(level, 0, str(e))
     
     def _generate_report(self):
         """生成测试报告"""
@@ -192,18 +367,23 @@ class ProductionTestRunner:
         # 统计结果
         total_tests = len(self.test_results)
         passed_tests = sum(1 for r in self.test_results if r["success"])
-        failed_tests = total_tests - passed_tests
+        empty_tests = sum(1 for r in self.test_results if r.get("no_tests"))
+        failed_tests = total_tests - passed_tests - empty_tests
         
         print(f"\n📈 测试统计:")
         print(f"  总测试级别: {total_tests}")
         print(f"  通过: {passed_tests}")
         print(f"  失败: {failed_tests}")
+        print(f"  未收集到测试: {empty_tests}")
         print(f"  成功率: {passed_tests/total_tests*100:.1f}%" if total_tests > 0 else "  成功率: 0%")
         
         # 详细结果
         print(f"\n📋 详细结果:")
         for result in self.test_results:
-            status = "✅ PASS" if result["success"] else "❌ FAIL"
+            if result.get("no_tests"):
+                status = "⚪ NO TESTS"
+            else:
+                status = "✅ PASS" if result["success"] else "❌ FAIL"
             print(f"  Level {result['level']}: {status} ({result['duration']:.1f}s)")
         
         # 保存报告到文件
@@ -217,13 +397,13 @@ class ProductionTestRunner:
                 "total_tests": total_tests,
                 "passed_tests": passed_tests,
                 "failed_tests": failed_tests,
+                "no_tests_collected": empty_tests,
                 "success_rate": passed_tests/total_tests if total_tests > 0 else 0
             },
             "results": self.test_results
         }
         
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, ensure_ascii=False)
+        report_file.write_bytes(_dump_json_bytes(report_data))
         
         print(f"\n💾 详细报告已保存到: {report_file}")
         
@@ -234,21 +414,24 @@ class ProductionTestRunner:
         """提供测试建议"""
         print(f"\n💡 建议:")
         
-        failed_levels = [r["level"] for r in self.test_results if not r["success"]]
+        failed_levels = [
+            r["level"] for r in self.test_results
+            if not r["success"] and not r.get("no_tests")
+        ]
+        empty_levels = [r["level"] for r in self.test_results if r.get("no_tests")]
+        
+        if empty_levels:
+            print(f"  ⚪ 以下级别未收集到测试: {', '.join(empty_levels)}")
+            print("  🔧 请检查测试类能否被pytest收集（测试类不能定义__init__）")
         
-        if not failed_levels:
+        if not failed_levels and not empty_levels:
             print("  🎉 所有测试都通过了！系统已准备好生产部署。")
-        else:
+        elif failed_levels:
             print(f"  ⚠️  以下级别的测试失败: {', '.join(failed_levels)}")
             
-            if "1" in failed_levels:
-                print("  🔧 Level 1失败表示基础功能有问题，请检查API和核心解析器")
-            if "2" in failed_levels:
-                print("  🔧 Level 2失败表示复杂场景处理有问题，请检查错误处理和边界情况")
-            if "3" in failed_levels:
-                print("  🔧 Level 3失败表示性能不达标，请优化算法和资源使用")
-            if "4" in failed_levels:
-                print("  🔧 Level 4失败表示用户体验有问题，请检查端到端流程")
+            for level, (_, _, _, hint) in TEST_LEVELS.items():
+                if level in failed_levels:
+                    print(f"  🔧 {hint}")
         
         # 性能建议
         slow_tests = [r for r in self.test_results if r.get("duration", 0) > 60]
@@ -5,13 +5,13 @@
 """
 import sys
 import subprocess
-import webbrowser
-from pathlib import Path
 from datetime import datetime
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
 
 
 def run_visual_tests(test_level="all", open_browser=True):
@@ -94,6 +94,7 @@ def run_visual_tests(test_level="all", open_browser=True):
             
             if open_browser:
                 print(f"\n🌐 正在打开测试报告...")
+                import webbrowser
                 webbrowser.open(f"file://{html_report.absolute()}")
             else:
                 print(f"\n💡 手动打开报告: file://{html_report.absolute()}")
@@ -5,13 +5,13 @@
 """
 import asyncio
 import sys
-from pathlib import Path
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# 添加项目根目录到Python路径，并获取共享的qwen3:4b提取器
+try:
+    from _qwen import get_extractor
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._qwen import get_extractor
 
-from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
 from app.requirements_parser.models.document import Document, DocumentType
 
 async def test_simple_extraction():
@@ -40,10 +40,7 @@ async def test_simple_extraction():
     print(f"📝 内容长度: {len(simple_doc.content)} 字符")
     
     # 创建提取器
-    extractor = LangChainExtractor(
-        provider=AIProvider.OLLAMA,
-        model="qwen3:4b"
-    )
+    extractor = get_extractor()
     
     print("\n🤖 开始AI提取...")
     
@@ -93,10 +90,7 @@ async def test_user_story_extraction():
         document_type=DocumentType.MARKDOWN
     )
     
-    extractor = LangChainExtractor(
-        provider=AIProvider.OLLAMA,
-        model="qwen3:4b"
-    )
+    extractor = get_extractor()
     
     try:
         requirements = await extractor.extract_async(story_doc)
@@ -119,13 +113,17 @@ async def main():
     
     results = []
     
-    # 测试1：简单需求提取
-    result1 = await test_simple_extraction()
-    results.append(("简单需求提取", result1))
-    
-    # 测试2：用户故事提取
-    result2 = await test_user_story_extraction()
-    results.append(("用户故事提取", result2))
+    try:
+        # 测试1：简单需求提取
+        result1 = await test_simple_extraction()
+        results.append(("简单需求提取", result1))
+        
+        # 测试2：用户故事提取
+        result2 = await test_user_story_extraction()
+        results.append(("用户故事提取", result2))
+    finally:
+        # 释放共享提取器的HTTP连接
+        await get_extractor().aclose()
     
     # 汇总结果
     print("\n" + "=" * 50)
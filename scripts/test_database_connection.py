@@ -6,11 +6,12 @@
 import asyncio
 import sys
 import os
-from pathlib import Path
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    import _bootstrap  # noqa: F401
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts import _bootstrap  # noqa: F401
 
 from app.core.database import DatabaseManager
 from app.core.config import get_settings
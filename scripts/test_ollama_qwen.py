@@ -6,13 +6,13 @@
 import asyncio
 import sys
 import json
-from pathlib import Path
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# 添加项目根目录到Python路径，并获取共享的qwen3:4b提取器
+try:
+    from _qwen import get_extractor
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._qwen import get_extractor
 
-from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
 from app.requirements_parser.models.document import Document, DocumentType
 
 async def test_ollama_connection():
@@ -49,11 +49,7 @@ async def test_requirements_extraction():
     
     try:
         # 创建提取器，使用qwen3:4b模型
-        extractor = LangChainExtractor(
-            provider=AIProvider.OLLAMA,
-            model="qwen3:4b",
-            ollama_url="http://localhost:11434"
-        )
+        extractor = get_extractor()
         
         # 创建测试文档
         document = Document(
@@ -123,10 +119,7 @@ async def test_extraction_quality():
     print("\n🔍 测试提取质量评估...")
     
     try:
-        extractor = LangChainExtractor(
-            provider=AIProvider.OLLAMA,
-            model="qwen3:4b"
-        )
+        extractor = get_extractor()
         
         # 简单测试文档
         document = Document(
@@ -171,10 +164,7 @@ async def test_chinese_optimization():
     print("\n🔍 测试中文需求提取...")
     
     try:
-        extractor = LangChainExtractor(
-            provider=AIProvider.OLLAMA,
-            model="qwen3:4b"
-        )
+        extractor = get_extractor()
         
         # 中文需求文档
         document = Document(
@@ -255,17 +245,21 @@ async def main():
         print("   3. 端口11434是否可访问")
         return 1
     
-    # 2. 测试需求提取
-    extraction_result = await test_requirements_extraction()
-    results.append(("需求提取", extraction_result))
-    
-    # 3. 测试质量评估
-    quality_result = await test_extraction_quality()
-    results.append(("质量评估", quality_result))
-    
-    # 4. 测试中文优化
-    chinese_result = await test_chinese_optimization()
-    results.append(("中文优化", chinese_result))
+    try:
+        # 2. 测试需求提取
+        extraction_result = await test_requirements_extraction()
+        results.append(("需求提取", extraction_result))
+        
+        # 3. 测试质量评估
+        quality_result = await test_extraction_quality()
+        results.append(("质量评估", quality_result))
+        
+        # 4. 测试中文优化
+        chinese_result = await test_chinese_optimization()
+        results.append(("中文优化", chinese_result))
+    finally:
+        # 释放共享提取器的HTTP连接
+        await get_extractor().aclose()
     
     # 汇总结果
     print("\n" + "="*60)
@@ -3,14 +3,17 @@
 测试日志查看器
 美观地显示测试执行日志
 """
-import sys
+import os
 import re
+from fnmatch import fnmatch
 from pathlib import Path
 from datetime import datetime
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
 
 
 class TestLogViewer:
@@ -22,20 +25,20 @@ class TestLogViewer:
     
     def view_latest_log(self):
         """查看最新的测试日志"""
-        log_files = list(self.reports_dir.glob("test_execution_*.log"))
+        log_files = self._scan_log_files()
         
         if not log_files:
             print("❌ 没有找到测试日志文件")
             print("💡 请先运行: uv run python scripts/detailed_test_runner.py")
             return
         
-        # 获取最新的日志文件
-        latest_log = max(log_files, key=lambda f: f.stat().st_mtime)
+        # 获取最新的日志文件（复用扫描时的stat结果）
+        latest_name, latest_stat = max(log_files, key=lambda item: item[1].st_mtime)
         
-        print(f"📝 查看测试日志: {latest_log.name}")
+        print(f"📝 查看测试日志: {latest_name}")
         print("=" * 80)
         
-        self._display_log_content(latest_log)
+        self._display_log_content(self.reports_dir / latest_name, latest_stat.st_size)
     
     def view_specific_log(self, log_file_path):
         """查看指定的日志文件"""
@@ -50,15 +53,23 @@ class TestLogViewer:
         
         self._display_log_content(log_file)
     
-    def _display_log_content(self, log_file):
-        """显示日志内容"""
+    def _display_log_content(self, log_file, file_size=None):
+        """
+        显示日志内容
+
+        Args:
+            log_file: 日志文件路径
+            file_size: 已知的文件大小（字节），未提供时读取文件状态
+        """
         try:
             with open(log_file, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
             
             print(f"📊 日志统计:")
             print(f"  📏 总行数: {len(lines)}")
-            print(f"  📅 文件大小: {log_file.stat().st_size / 1024:.1f} KB")
+            if file_size is None:
+                file_size = log_file.stat().st_size
+            print(f"  📅 文件大小: {file_size / 1024:.1f} KB")
             print()
             
             # 分类显示日志
@@ -126,23 +137,38 @@ class TestLogViewer:
             else:
                 print(f"  {log}")
     
+    def _scan_log_files(self):
+        """
+        单次扫描报告目录，返回日志文件及其stat信息
+
+        Returns:
+            list: (文件名, stat结果) 列表
+        """
+        try:
+            with os.scandir(self.reports_dir) as entries:
+                return [
+                    (entry.name, entry.stat())
+                    for entry in entries
+                    if entry.is_file() and fnmatch(entry.name, "test_execution_*.log")
+                ]
+        except FileNotFoundError:
+            return []
+
     def list_available_logs(self):
         """列出可用的日志文件"""
-        log_files = list(self.reports_dir.glob("test_execution_*.log"))
+        log_files = self._scan_log_files()
         
         if not log_files:
             print("❌ 没有找到测试日志文件")
             return
         
-        print("📁 可用的测试日志文件:")
-        print("-" * 50)
+        # 按时间排序（复用扫描时的stat结果）
+        log_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
         
-        # 按时间排序
-        log_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
-        
-        for i, log_file in enumerate(log_files, 1):
+        lines = ["📁 可用的测试日志文件:", "-" * 50]
+        for i, (name, stat_result) in enumerate(log_files, 1):
             # 提取时间戳
-            timestamp_match = re.search(r'(\d{8}_\d{6})', log_file.name)
+            timestamp_match = re.search(r'(\d{8}_\d{6})', name)
             if timestamp_match:
                 timestamp_str = timestamp_match.group(1)
                 try:
@@ -153,11 +179,12 @@ class TestLogViewer:
             else:
                 formatted_time = "未知时间"
             
-            file_size = log_file.stat().st_size / 1024
-            print(f"  {i}. {log_file.name}")
-            print(f"     时间: {formatted_time}")
-            print(f"     大小: {file_size:.1f} KB")
-            print()
+            lines.append(f"  {i}. {name}")
+            lines.append(f"     时间: {formatted_time}")
+            lines.append(f"     大小: {stat_result.st_size / 1024:.1f} KB")
+            lines.append("")
+        
+        print("\n".join(lines))
 
 
 def main():
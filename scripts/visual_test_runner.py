@@ -9,11 +9,59 @@ import json
 import subprocess
 from pathlib import Path
 from datetime import datetime
-import webbrowser
+from string import Template
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # 添加项目根目录到Python路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+try:
+    from _bootstrap import project_root
+except ImportError:  # 以模块方式运行（python -m scripts.xxx）
+    from scripts._bootstrap import project_root
+
+# 自定义报告头部模板（模块级预定义，CSS花括号无需转义，生成报告时只做变量替换）
+CUSTOM_HEADER_TEMPLATE = Template("""
+<style>
+.custom-header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 20px;
+    margin-bottom: 20px;
+    border-radius: 8px;
+    text-align: center;
+}
+.custom-stats {
+    display: flex;
+    justify-content: space-around;
+    margin: 20px 0;
+}
+.stat-card {
+    background: #f8f9fa;
+    padding: 15px;
+    border-radius: 8px;
+    text-align: center;
+    min-width: 120px;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+.stat-number {
+    font-size: 2em;
+    font-weight: bold;
+    color: #2c3e50;
+}
+.stat-label {
+    color: #7f8c8d;
+    font-size: 0.9em;
+}
+</style>
+<div class="custom-header">
+    <h1>🏭 TestMind AI - 测试报告</h1>
+    <p>生成时间: $generated_at</p>
+    <p>执行耗时: ${duration}秒</p>
+</div>
+""")
 
 
 class VisualTestRunner:
@@ -24,20 +72,31 @@ class VisualTestRunner:
         self.reports_dir = self.project_root / "test_reports"
         self.reports_dir.mkdir(exist_ok=True)
         
-    def run_visual_tests(self, test_level: str = "all", open_browser: bool = True):
-        """运行可视化测试"""
+    def run_visual_tests(self, test_level: str = "all", open_browser: bool = True,
+                         last_failed: bool = False, cache_clear: bool = False):
+        """
+        运行可视化测试
+
+        Args:
+            test_level: 测试级别
+            open_browser: 是否自动打开浏览器
+            last_failed: 只重新运行上次失败的测试（无失败记录时运行全部）
+            cache_clear: 运行前清空pytest缓存
+        """
         print("🎨 TestMind AI - 可视化测试运行器")
         print("=" * 50)
         print(f"测试级别: {test_level}")
-        print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        started_at = datetime.now()
+        print(f"开始时间: {started_at.strftime('%Y-%m-%d %H:%M:%S')}")
         
         # 生成时间戳
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = started_at.strftime('%Y%m%d_%H%M%S')
         
         # 设置报告文件路径
         html_report = self.reports_dir / f"test_report_{timestamp}.html"
         json_report = self.reports_dir / f"test_report_{timestamp}.json"
         coverage_report = self.reports_dir / f"coverage_{timestamp}"
+        output_log = self.reports_dir / f"test_output_{timestamp}.log"
         
         # 确定测试文件
         if test_level == "all":
@@ -69,6 +128,10 @@ class VisualTestRunner:
             f"--cov-report=html:{coverage_report}",
             "--cov-report=term-missing"
         ]
+        if last_failed:
+            cmd += ["--last-failed", "--last-failed-no-failures=all"]
+        if cache_clear:
+            cmd.append("--cache-clear")
         
         print(f"\n🔍 执行测试命令:")
         print(f"uv run pytest {' '.join(test_files)} --html={html_report.name}")
@@ -76,14 +139,15 @@ class VisualTestRunner:
         start_time = time.time()
         
         try:
-            # 执行测试
-            result = subprocess.run(
-                cmd,
-                cwd=self.project_root,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分钟超时
-            )
+            # 执行测试，输出直接写入日志文件而不在内存中缓冲
+            with open(output_log, 'wb') as log_file:
+                result = subprocess.run(
+                    cmd,
+                    cwd=self.project_root,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                    timeout=300  # 5分钟超时
+                )
             
             duration = time.time() - start_time
             
@@ -106,12 +170,14 @@ class VisualTestRunner:
             # 打开浏览器
             if open_browser and html_report.exists():
                 print(f"\n🌐 正在打开测试报告...")
+                import webbrowser
                 webbrowser.open(f"file://{html_report.absolute()}")
             
             print(f"\n📁 报告文件位置:")
             print(f"  HTML报告: {html_report}")
             print(f"  JSON数据: {json_report}")
             print(f"  覆盖率报告: {coverage_report}/index.html")
+            print(f"  测试输出: {output_log}")
             
             return result.returncode == 0
             
@@ -125,8 +191,8 @@ class VisualTestRunner:
     def _display_test_summary(self, json_report_path: Path):
         """显示测试摘要"""
         try:
-            with open(json_report_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            raw = json_report_path.read_bytes()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
             
             summary = data.get('summary', {})
             
@@ -159,52 +225,16 @@ class VisualTestRunner:
                 html_content = f.read()
             
             # 添加自定义样式和脚本
-            custom_header = f"""
-<style>
-.custom-header {{
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    color: white;
-    padding: 20px;
-    margin-bottom: 20px;
-    border-radius: 8px;
-    text-align: center;
-}}
-.custom-stats {{
-    display: flex;
-    justify-content: space-around;
-    margin: 20px 0;
-}}
-.stat-card {{
-    background: #f8f9fa;
-    padding: 15px;
-    border-radius: 8px;
-    text-align: center;
-    min-width: 120px;
-    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-}}
-.stat-number {{
-    font-size: 2em;
-    font-weight: bold;
-    color: #2c3e50;
-}}
-.stat-label {{
-    color: #7f8c8d;
-    font-size: 0.9em;
-}}
-</style>
-<div class="custom-header">
-    <h1>🏭 TestMind AI - 测试报告</h1>
-    <p>生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    <p>执行耗时: {duration:.2f}秒</p>
-</div>
-"""
+            custom_header = CUSTOM_HEADER_TEMPLATE.substitute({
+                "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "duration": f"{duration:.2f}"
+            })
             
             # 插入自定义头部
             html_content = html_content.replace('<body>', f'<body>{custom_header}')
             
             # 保存增强的HTML报告
-            with open(html_report, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            html_report.write_text(html_content, encoding='utf-8')
                 
         except Exception as e:
             print(f"⚠️ 生成自定义报告失败: {e}")
@@ -226,13 +256,26 @@ def main():
         action="store_true",
         help="不自动打开浏览器"
     )
+    parser.add_argument(
+        "--lf", "--last-failed",
+        dest="last_failed",
+        action="store_true",
+        help="只重新运行上次失败的测试"
+    )
+    parser.add_argument(
+        "--cache-clear",
+        action="store_true",
+        help="运行前清空pytest缓存"
+    )
     
     args = parser.parse_args()
     
     runner = VisualTestRunner()
     success = runner.run_visual_tests(
         test_level=args.level,
-        open_browser=not args.no_browser
+        open_browser=not args.no_browser,
+        last_failed=args.last_failed,
+        cache_clear=args.cache_clear
     )
     
     if success:
@@ -13,6 +13,7 @@ from typing import Dict, List, Any
 from concurrent.futures import ThreadPoolExecutor
 import psutil
 import gc
+from functools import lru_cache
 
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
@@ -21,6 +22,50 @@ from app.main import create_app
 from app.requirements_parser.service import RequirementsParsingService
 
 
+# 当前测试进程（复用同一个Process对象采样内存）
+_PROCESS = psutil.Process()
+
+
+def _current_memory_mb() -> float:
+    """回收垃圾后采样当前进程常驻内存（MB），获得稳定基线"""
+    gc.collect()
+    return _PROCESS.memory_info().rss / 1024 / 1024
+
+
+# 大型文档中单个模块的内容模板
+LARGE_MARKDOWN_MODULE_TEMPLATE = """
+## 模块 {n}
+
+### 功能需求 {n}.1
+这是模块{n}的功能需求描述。包含详细的业务逻辑和实现要求。
+
+### 非功能需求 {n}.2
+- 性能要求：响应时间 < {n}秒
+- 可用性要求：系统可用性 > 99.{mod}%
+- 安全要求：数据加密传输
+
+### 用户故事 {n}.3
+作为用户{n}，我希望能够使用功能{n}，以便完成任务{n}。
+
+### 验收标准 {n}.4
+| 标准 | 描述 | 优先级 |
+|------|------|--------|
+| 标准{n}.1 | 功能正常工作 | 高 |
+| 标准{n}.2 | 性能满足要求 | 中 |
+| 标准{n}.3 | 用户体验良好 | 低 |
+
+"""
+
+
+@lru_cache(maxsize=None)
+def _build_large_markdown_content() -> str:
+    """构建大型Markdown测试内容（结果缓存，避免每次测试重复拼接）"""
+    parts = ["# 大型需求文档\n\n"]
+    for i in range(100):
+        parts.append(LARGE_MARKDOWN_MODULE_TEMPLATE.format(n=i + 1, mod=i % 10))
+    return "".join(parts)
+
+
 class ProductionTestSuite:
     """生产级测试套件"""
     
@@ -51,7 +96,7 @@ class TestLevel1QuickValidation:
 
     def test_api_health_check(self):
         """API健康检查"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 检查健康端点
         response = self.suite.client.get("/health")
@@ -61,7 +106,7 @@ class TestLevel1QuickValidation:
         response = self.suite.client.get("/api/v1/requirements/formats")
         assert response.status_code == 200
 
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         self.suite.log_result("API健康检查", "PASS", {
             "duration": f"{duration:.3f}s",
             "endpoints_checked": 2
@@ -92,7 +137,7 @@ class TestLevel1QuickValidation:
     
     def test_simple_markdown_parsing(self):
         """简单Markdown解析测试"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         simple_md = self.suite.test_data_dir / "markdown" / "simple.md"
         if not simple_md.exists():
@@ -113,7 +158,7 @@ class TestLevel1QuickValidation:
         assert "requirements" in data
         assert "metadata" in data
 
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         self.suite.log_result("简单Markdown解析", "PASS", {
             "duration": f"{duration:.3f}s",
             "file_size": data["metadata"]["file_size"],
@@ -126,7 +171,7 @@ class TestLevel2ComprehensiveFunctionality(ProductionTestSuite):
     
     def test_complex_markdown_parsing(self):
         """复杂Markdown解析测试"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         complex_md = self.test_data_dir / "markdown" / "complex.md"
         if not complex_md.exists():
@@ -147,7 +192,7 @@ class TestLevel2ComprehensiveFunctionality(ProductionTestSuite):
         assert document["title"]
         assert len(document["sections"]) > 5  # 复杂文档应该有多个章节
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         self.log_result("复杂Markdown解析", "PASS", {
             "duration": f"{duration:.3f}s",
             "sections_count": len(document["sections"]),
@@ -203,7 +248,7 @@ class TestLevel2ComprehensiveFunctionality(ProductionTestSuite):
         providers = ["mock", "openai", "ollama"]
         
         for provider in providers:
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             with open(simple_md, 'rb') as f:
                 response = self.client.post(
@@ -220,7 +265,7 @@ class TestLevel2ComprehensiveFunctionality(ProductionTestSuite):
                 # 其他提供商可能因为API密钥等问题失败，这是正常的
                 status = "PASS" if response.status_code in [200, 500] else "FAIL"
             
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             self.log_result(f"AI提供商-{provider}", status, {
                 "duration": f"{duration:.3f}s",
                 "status_code": response.status_code
@@ -235,13 +280,14 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
         # 创建大型测试文档
         large_content = self._create_large_markdown_content()
         
-        start_time = time.time()
-        memory_before = psutil.Process().memory_info().rss / 1024 / 1024  # MB
-        
+        # 测试文件在计时和内存采样窗口之外准备
         with tempfile.NamedTemporaryFile(suffix='.md', delete=False) as f:
             f.write(large_content.encode('utf-8'))
             temp_path = f.name
         
+        memory_before = _current_memory_mb()
+        start_time = time.perf_counter()
+        
         try:
             with open(temp_path, 'rb') as f:
                 response = self.client.post(
@@ -250,8 +296,8 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
                     data={"ai_provider": "mock"}
                 )
             
-            duration = time.time() - start_time
-            memory_after = psutil.Process().memory_info().rss / 1024 / 1024  # MB
+            duration = time.perf_counter() - start_time
+            memory_after = _current_memory_mb()
             memory_used = memory_after - memory_before
             
             assert response.status_code == 200
@@ -282,14 +328,14 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
                 )
             return response.status_code == 200
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 并发10个请求
         with ThreadPoolExecutor(max_workers=10) as executor:
             futures = [executor.submit(make_request) for _ in range(10)]
             results = [future.result() for future in futures]
         
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         success_rate = sum(results) / len(results)
         
         assert success_rate >= 0.8  # 至少80%成功率
@@ -308,8 +354,7 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
             pytest.skip("测试文件不存在")
         
         # 记录初始内存
-        gc.collect()
-        initial_memory = psutil.Process().memory_info().rss / 1024 / 1024
+        initial_memory = _current_memory_mb()
         
         # 执行多次请求
         for i in range(50):
@@ -321,9 +366,8 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
                 )
             assert response.status_code == 200
         
-        # 强制垃圾回收
-        gc.collect()
-        final_memory = psutil.Process().memory_info().rss / 1024 / 1024
+        # 强制垃圾回收后记录最终内存
+        final_memory = _current_memory_mb()
         memory_increase = final_memory - initial_memory
         
         # 内存增长应该在合理范围内（< 100MB）
@@ -338,34 +382,8 @@ class TestLevel3PerformanceStress(ProductionTestSuite):
         })
     
     def _create_large_markdown_content(self) -> str:
-        """创建大型Markdown内容"""
-        content = "# 大型需求文档\n\n"
-        
-        for i in range(100):
-            content += f"""
-## 模块 {i+1}
-
-### 功能需求 {i+1}.1
-这是模块{i+1}的功能需求描述。包含详细的业务逻辑和实现要求。
-
-### 非功能需求 {i+1}.2
-- 性能要求：响应时间 < {i+1}秒
-- 可用性要求：系统可用性 > 99.{i%10}%
-- 安全要求：数据加密传输
-
-### 用户故事 {i+1}.3
-作为用户{i+1}，我希望能够使用功能{i+1}，以便完成任务{i+1}。
-
-### 验收标准 {i+1}.4
-| 标准 | 描述 | 优先级 |
-|------|------|--------|
-| 标准{i+1}.1 | 功能正常工作 | 高 |
-| 标准{i+1}.2 | 性能满足要求 | 中 |
-| 标准{i+1}.3 | 用户体验良好 | 低 |
-
-"""
-        
-        return content
+        """创建大型Markdown内容（整个进程只构建一次）"""
+        return _build_large_markdown_content()
 
 
 class TestLevel4UserAcceptance(ProductionTestSuite):
@@ -380,7 +398,7 @@ class TestLevel4UserAcceptance(ProductionTestSuite):
         if not simple_md.exists():
             pytest.skip("测试文件不存在")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 步骤1：检查支持的格式
         response = self.client.get("/api/v1/requirements/formats")
@@ -411,7 +429,7 @@ class TestLevel4UserAcceptance(ProductionTestSuite):
             "accuracy_ok": metadata["extraction_accuracy"] > 0.7
         }
         
-        total_duration = time.time() - start_time
+        total_duration = time.perf_counter() - start_time
         
         # 所有质量检查都应该通过
         assert all(quality_checks.values())
@@ -2,16 +2,44 @@
 Sprint 2 - LangChain需求提取器简化测试
 测试多AI提供商的需求提取功能
 """
+import asyncio
+import json
+
+import httpx
 import pytest
+from app.core.config import Settings, get_settings
 from app.requirements_parser.extractors.langchain_extractor import LangChainExtractor, AIProvider
+from app.requirements_parser.extractors.llm_cache import LLMResponseCache
 from app.requirements_parser.models.document import Document, DocumentType
-from app.requirements_parser.models.requirement import RequirementType, Priority
+from app.requirements_parser.models.requirement import (
+    RequirementType, Priority, Requirement, RequirementCollection
+)
 
 @pytest.fixture
 def mock_extractor():
     """MOCK提取器fixture"""
     return LangChainExtractor(provider=AIProvider.MOCK, api_key="mock-key")
 
+@pytest.fixture
+def ollama_requests():
+    """发往Ollama的请求体记录"""
+    return []
+
+@pytest.fixture
+def make_ollama_extractor(ollama_requests):
+    """创建请求由MockTransport处理的Ollama提取器（不访问真实服务，请求体记录到ollama_requests）"""
+    def handler(request):
+        ollama_requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "[]", "done": True})
+
+    def _make():
+        return LangChainExtractor(
+            provider=AIProvider.OLLAMA,
+            model="qwen3:4b",
+            http_transport=httpx.MockTransport(handler)
+        )
+    return _make
+
 @pytest.fixture
 def sample_document():
     """示例文档fixture"""
@@ -173,3 +201,174 @@ class TestAIProviders:
         
         with pytest.raises(Exception, match="需求提取失败"):
             await extractor.extract_async(document)
+
+class TestLLMResponseCache:
+    """测试LLM响应缓存"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_ai_call(self, tmp_path, sample_document):
+        """测试相同提示词第二次调用命中缓存"""
+        extractor = LangChainExtractor(
+            provider=AIProvider.MOCK,
+            cache_path=str(tmp_path / "llm_cache.db")
+        )
+
+        call_count = 0
+        original_call = extractor._call_ai_api
+
+        async def counting_call(messages):
+            nonlocal call_count
+            call_count += 1
+            return await original_call(messages)
+
+        extractor._call_ai_api = counting_call
+
+        first = await extractor.extract_async(sample_document)
+        second = await extractor.extract_async(sample_document)
+
+        assert call_count == 1
+        assert [r.title for r in first] == [r.title for r in second]
+
+    def test_cache_disabled_by_default(self):
+        """测试默认不启用缓存"""
+        extractor = LangChainExtractor(provider=AIProvider.MOCK)
+        assert extractor.cache is None
+
+    def test_empty_cache_path_overrides_settings(self, monkeypatch):
+        """测试传入空缓存路径时即使配置启用也不使用缓存"""
+        monkeypatch.setattr(get_settings(), "llm_cache_enabled", True)
+        extractor = LangChainExtractor(provider=AIProvider.MOCK, cache_path="")
+        assert extractor.cache is None
+
+    def test_memory_layer_serves_hits_and_evicts(self, tmp_path):
+        """测试内存LRU层命中及容量淘汰"""
+        cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), memory_size=1)
+        cache.set("a", "响应A")
+        cache.set("b", "响应B")
+
+        assert list(cache._memory) == ["b"]
+        # 被淘汰的条目仍可从SQLite读取，并重新进入内存层
+        assert cache.get("a") == "响应A"
+        assert list(cache._memory) == ["a"]
+        cache.close()
+
+class TestWarmup:
+    """测试模型预热"""
+
+    @pytest.mark.asyncio
+    async def test_ollama_warmup_posts_keep_alive(self, make_ollama_extractor, ollama_requests):
+        """测试Ollama预热发送空提示词并携带keep_alive"""
+        extractor = make_ollama_extractor()
+
+        assert await extractor.warmup(keep_alive="1h") is True
+        assert ollama_requests == [{"model": "qwen3:4b", "prompt": "", "stream": False, "keep_alive": "1h"}]
+        await extractor.aclose()
+
+    @pytest.mark.asyncio
+    async def test_generate_request_keeps_model_loaded(self, sample_document, monkeypatch,
+                                                       make_ollama_extractor, ollama_requests):
+        """测试提取请求携带配置的keep_alive，纯数字按秒数以数值发送"""
+        monkeypatch.setattr(get_settings(), "ollama_keep_alive", "-1")
+        extractor = make_ollama_extractor()
+
+        await extractor.warmup()
+        await extractor.extract_async(sample_document)
+
+        assert [payload["keep_alive"] for payload in ollama_requests] == [-1, -1]
+        await extractor.aclose()
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_omitted_by_default(self, sample_document, monkeypatch,
+                                                 make_ollama_extractor, ollama_requests):
+        """测试未配置keep_alive时不发送该字段，沿用Ollama服务端设置"""
+        monkeypatch.setattr(get_settings(), "ollama_keep_alive", None)
+        extractor = make_ollama_extractor()
+
+        await extractor.warmup()
+        await extractor.extract_async(sample_document)
+
+        assert len(ollama_requests) == 2
+        assert all("keep_alive" not in payload for payload in ollama_requests)
+        await extractor.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warmup_skipped_for_other_providers(self, mock_extractor):
+        """测试非Ollama提供商不执行预热"""
+        assert await mock_extractor.warmup() is False
+
+
+class TestBatchExtraction:
+    """测试批量提取"""
+
+    @pytest.mark.asyncio
+    async def test_extract_batch_runs_concurrently(self, mock_extractor):
+        """测试批量提取并发执行且保持文档顺序"""
+        documents = [
+            Document(title=f"文档{i}", content=f"需求内容{i}", document_type=DocumentType.MARKDOWN)
+            for i in range(4)
+        ]
+
+        in_flight = 0
+        max_in_flight = 0
+        original_call = mock_extractor._call_ai_api
+
+        async def slow_call(messages):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return await original_call(messages)
+
+        mock_extractor._call_ai_api = slow_call
+
+        results = await mock_extractor.extract_batch(documents, max_concurrency=2)
+
+        assert list(results.keys()) == [doc.title for doc in documents]
+        assert all(len(reqs) >= 1 for reqs in results.values())
+        assert max_in_flight == 2
+
+class TestRequirementCollectionStatistics:
+    """测试需求集合统计"""
+
+    def test_statistics_with_string_status(self):
+        """测试状态以字符串传入时统计正常"""
+        collection = RequirementCollection()
+        collection.add_requirement(Requirement(
+            id="REQ-001", title="登录", description="用户登录",
+            type="functional", priority="high", status="approved"
+        ))
+        collection.add_requirement(Requirement(
+            id="REQ-002", title="性能", description="响应时间小于2秒",
+            type=RequirementType.NON_FUNCTIONAL
+        ))
+
+        assert collection.total_count == 2
+        assert collection.functional_count == 1
+        assert collection.non_functional_count == 1
+        assert collection.priority_distribution == {"high": 1, "medium": 1}
+        assert collection.status_distribution == {"approved": 1, "draft": 1}
+
+class TestRequestTimeout:
+    """测试AI调用超时"""
+
+    @pytest.mark.asyncio
+    async def test_slow_ai_call_times_out(self, sample_document):
+        """测试AI调用超过时限时抛出超时错误"""
+        extractor = LangChainExtractor(provider=AIProvider.MOCK, request_timeout=0.01)
+
+        async def stalled_call(messages):
+            await asyncio.sleep(1)
+            return "[]"
+
+        extractor._call_ai_api = stalled_call
+
+        with pytest.raises(Exception, match="AI调用超时"):
+            await extractor.extract_async(sample_document)
+
+    def test_no_overall_timeout_by_default(self, monkeypatch):
+        """测试默认不设置总超时，慢速的本地模型不会被中途取消"""
+        assert Settings.model_fields["ai_request_timeout"].default == 0
+        monkeypatch.setattr(get_settings(), "ai_request_timeout", 0)
+        extractor = LangChainExtractor(provider=AIProvider.MOCK)
+        assert extractor.request_timeout is None
@@ -270,3 +270,26 @@ async def create_user(user: UserCreate):
         # 验证解析结果
         assert document.title == "大型文档"
         assert len(document.sections) == 101  # 包含主标题 + 100个子章节
+    
+    def test_parse_from_multiple_threads(self):
+        """测试同一解析器实例在多个线程中并发解析"""
+        import sys
+        from concurrent.futures import ThreadPoolExecutor
+        
+        parser = MarkdownParser()
+        documents = [
+            f"# 文档{i}\n\n## 功能需求\n\n- 功能{i}\n    - 子功能{i}\n\n"
+            f"> 引用{i}\n\n| 功能 | 说明 |\n|---|---|\n| 功能{i} | 说明{i} |\n"
+            for i in range(1600)
+        ]
+        
+        # 缩短线程切换间隔，让线程交错更频繁
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(parser.parse, documents))
+        finally:
+            sys.setswitchinterval(switch_interval)
+        
+        assert [document.title for document in results] == [f"文档{i}" for i in range(1600)]
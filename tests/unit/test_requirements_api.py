@@ -121,6 +121,17 @@ class TestRequirementsAPI:
         finally:
             os.unlink(temp_file_path)
     
+    def test_parse_with_unsupported_ai_provider(self, client):
+        """测试不支持的AI提供商返回400"""
+        response = client.post(
+            "/api/v1/requirements/parse",
+            files={"file": ("test.md", "# 测试文档".encode("utf-8"), "text/markdown")},
+            data={"ai_provider": "unknown"}
+        )
+        
+        assert response.status_code == 400
+        assert "不支持的AI提供商: unknown" in response.json()["detail"]
+    
     def test_parse_requirements_with_options(self, client):
         """测试带选项的需求解析"""
         markdown_content = """
@@ -193,6 +204,33 @@ class TestRequirementsAPI:
         finally:
             os.unlink(temp_file_path)
     
+    @pytest.mark.asyncio
+    async def test_parse_requirements_concurrent_uploads(self, app):
+        """测试并发上传时共享的解析服务不会互相干扰"""
+        import asyncio
+        from httpx import ASGITransport
+        transport = ASGITransport(app=app)
+        
+        def build_markdown(index: int) -> bytes:
+            sections = "".join(
+                f"## 模块{index}-{n}\n\n| 功能 | 说明 |\n|---|---|\n| 功能{n} | **说明**{n} |\n\n"
+                for n in range(30)
+            )
+            return f"# 并发文档{index}\n\n{sections}".encode("utf-8")
+        
+        async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+            responses = await asyncio.gather(*(
+                ac.post(
+                    "/api/v1/requirements/parse",
+                    files={"file": (f"doc{i}.md", build_markdown(i), "text/markdown")}
+                )
+                for i in range(8)
+            ))
+        
+        for i, response in enumerate(responses):
+            assert response.status_code == 200, response.text
+            assert response.json()["document"]["title"] == f"并发文档{i}"
+    
     def test_get_parse_status(self, client):
         """测试获取解析状态"""
         # 这个端点用于查询异步解析任务的状态